@@ -0,0 +1,567 @@
+# BENCHMARKS FOR EXCEL TO LATEX VIA PYTHON
+########################################################################################################################
+#
+# This code times Excel2LaTeXviaPython on synthetic workbooks, so that any changes to the speed of the code can be
+# spotted. It times both the whole conversion (excel2latexviapython) on workbooks of different shapes and formatting,
+# and the slower helper functions on their own. Run this file directly to print the timings to the terminal:
+#
+#     python benchmark_excel2latexviapython.py --output results.json
+#
+# The results (seconds, cells/sec and peak memory use) are written to a JSON file. Running the benchmarks again with
+# --baseline results.json prints how each timing compares to the earlier run.
+#
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor  # For running each conversion in a fresh process
+from contextlib import redirect_stdout
+
+import openpyxl  # Package for reading excel files (.xlsx) into Python
+from openpyxl.styles import Alignment, Border, Color, Side, Font, PatternFill
+
+import e2lvp
+
+
+# BENCHMARK SETTINGS
+# ======================================================================================================================
+
+# Number of rows of formatted-but-empty cells below the table in the table dimension benchmark
+num_trailing_rows = 10000
+
+# Number of used rows (a small table followed by formatted-but-empty rows) in the sheet overhead benchmark
+num_overhead_rows = 100000
+
+# Number of cells in the number rounding benchmark
+num_rounding_cells = 1000000
+
+# Number of times to repeat each timing (the fastest time is reported)
+num_repeats = 3
+
+# Synthetic workbooks converted by the excel2latexviapython benchmark: name of the scenario, the settings passed to
+# make_synthetic_workbook, and the options passed to excel2latexviapython
+large_sheet_settings = dict(num_sheets=1, num_rows=10000, num_cols=12, merge_density=0.005, border_density=0.05,
+                            fill_density=0.05)
+
+workbook_scenarios = [
+    ('plain', dict(num_sheets=4, num_rows=500, num_cols=10), {}),
+    ('formatted', dict(num_sheets=4, num_rows=500, num_cols=10, merge_density=0.02, border_density=0.2,
+                       fill_density=0.2), {}),
+    ('many_sheets', dict(num_sheets=100, num_rows=20, num_cols=6, border_density=0.1, fill_density=0.1), {}),
+    ('large_sheet', large_sheet_settings, {}),
+    ('large_streamed', large_sheet_settings, dict(streaming=True, chunk_rows=1000)),
+]
+
+# Settings of the synthetic workbook converted by the conversion cache benchmark
+cache_workbook_settings = dict(num_sheets=20, num_rows=500, num_cols=10, merge_density=0.02, border_density=0.2,
+                               fill_density=0.2)
+
+# Settings of the synthetic worksheet used by the helper function benchmarks
+helper_sheet_settings = dict(num_rows=5000, num_cols=10, merge_density=0.02, border_density=0.2, fill_density=0.2)
+
+
+# HELPER FUNCTIONS
+# ======================================================================================================================
+
+def _time_function(fun, *args):
+    """
+    Time how long it takes to run fun(*args). The function is run num_repeats times and the fastest time is returned,
+    along with the output of the function.
+
+    :param fun: function to time
+    :param args: arguments to pass to the function
+    :return: (fastest time in seconds, output of the function)
+    """
+
+    best_time = None
+    output = None
+
+    for _ in range(0, num_repeats):
+        tic = time.perf_counter()
+        output = fun(*args)
+        toc = time.perf_counter() - tic
+
+        if (best_time is None) or (toc < best_time):
+            best_time = toc
+
+    return best_time, output
+
+
+def make_sheet_with_trailing_format(num_rows, num_cols=6, table_rows=8, table_cols=4):
+    """
+    Create a worksheet with a small table starting in cell B3, and num_rows rows of formatted-but-empty cells below it.
+    This replicates sheets where formatting has been applied to whole columns, which gives a large "used range" but
+    only a small table.
+
+    :param num_rows: number of rows of formatted-but-empty cells to add below the table
+    :param num_cols: number of columns the formatting is applied to
+    :param table_rows: number of rows in the table
+    :param table_cols: number of columns in the table
+    :return: openpyxl worksheet object
+    """
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+
+    # Write the table
+    for row_num in range(0, table_rows):
+        for col_num in range(0, table_cols):
+            sheet.cell(row=row_num + 3, column=col_num + 2, value=row_num * table_cols + col_num + 0.12345)
+
+    # Add the formatted-but-empty cells below the table
+    font = Font(bold=True)
+    border = Border(bottom=Side(border_style='thin'))
+
+    for row_num in range(table_rows + 3, table_rows + 3 + num_rows):
+        for col_num in range(1, num_cols + 1):
+            cell = sheet.cell(row=row_num, column=col_num)
+            cell.font = font
+            cell.border = border
+
+    return sheet
+
+
+def make_stats_table_cells(num_cells, seed=0):
+    """
+    Create the contents of the cells of a large table of regression results: coefficients with significance stars,
+    standard errors in parenthesis, and plain numbers (as both strings and floats).
+
+    :param num_cells: number of cells to create
+    :param seed: seed for the random number generator
+    :return: (list of cell strings, list of cell floats)
+    """
+
+    rng = random.Random(seed)
+
+    cell_strings = []
+    cell_floats = []
+
+    for cell_num in range(0, num_cells):
+        number = round(rng.gauss(0, 1), 6)
+
+        if cell_num % 3 == 0:
+            cell_strings.append(str(number) + '*' * rng.randint(0, 3))
+        elif cell_num % 3 == 1:
+            cell_strings.append('(' + str(abs(number)) + ')')
+        else:
+            cell_strings.append(str(number))
+
+        cell_floats.append(number)
+
+    return cell_strings, cell_floats
+
+
+def fill_synthetic_sheet(sheet, num_rows, num_cols, merge_density=0.0, border_density=0.0, fill_density=0.0, seed=0):
+    """
+    Fill a worksheet with a synthetic table: a row of column labels, a column of row labels, and a body of regression
+    results (numbers, numbers with significance stars, and standard errors in parenthesis). Formatting is added at
+    random to the given share of the cells.
+
+    :param sheet: openpyxl worksheet object to fill
+    :param num_rows: number of rows in the table
+    :param num_cols: number of columns in the table
+    :param merge_density: share of the cells that start a merged cell (spanning 2-3 columns, and sometimes 2 rows)
+    :param border_density: share of the cells with a top or bottom border (and share of the columns with a left border)
+    :param fill_density: share of the cells with a background fill, colored text, or bold/italic text
+    :param seed: seed for the random number generator
+    :return: None
+    """
+
+    rng = random.Random(seed)
+
+    thin = Side(border_style='thin')
+    borders = [Border(top=thin), Border(bottom=thin), Border(top=thin, bottom=thin)]
+    fills = [PatternFill(start_color=color, end_color=color, fill_type='solid') for color in ('FFFF00', 'D9D9D9')]
+    # Fonts are given a text color, as Excel does (the default black text is color 1 of the theme)
+    fonts = [Font(bold=True, color=Color(theme=1)), Font(italic=True, color=Color(theme=1)), Font(color='FFFF0000')]
+
+    # Columns with a vertical border down their left side
+    bordered_cols = set(col_num for col_num in range(1, num_cols) if rng.random() < border_density)
+
+    merged = set()  # Cells already covered by a merged cell
+
+    for row_num in range(1, num_rows + 1):
+        for col_num in range(1, num_cols + 1):
+
+            # Contents of the cell
+            if row_num == 1:
+                value = 'column ' + str(col_num)
+            elif col_num == 1:
+                value = 'row ' + str(row_num)
+            elif (row_num + col_num) % 3 == 0:
+                value = '%.6f' % rng.gauss(0, 1) + '*' * rng.randint(0, 3)
+            elif (row_num + col_num) % 3 == 1:
+                value = '(%.6f)' % abs(rng.gauss(0, 1))
+            else:
+                value = rng.gauss(0, 1)
+
+            cell = sheet.cell(row=row_num, column=col_num, value=value)
+
+            # Formatting of the cell
+            if rng.random() < border_density:
+                border = rng.choice(borders)
+                cell.border = Border(left=thin, top=border.top, bottom=border.bottom) if col_num in bordered_cols \
+                    else border
+            elif col_num in bordered_cols:
+                cell.border = Border(left=thin)
+
+            if rng.random() < fill_density:
+                cell.fill = rng.choice(fills)
+            if rng.random() < fill_density:
+                cell.font = rng.choice(fonts)
+
+            # Merged cells (that do not overlap any other merged cell)
+            if (rng.random() < merge_density) and ((row_num, col_num) not in merged):
+                num_merge_cols = min(rng.randint(2, 3), num_cols - col_num + 1)
+                num_merge_rows = min(rng.choice((1, 1, 1, 2)), num_rows - row_num + 1)
+
+                covered = [(r, c) for r in range(row_num, row_num + num_merge_rows)
+                           for c in range(col_num, col_num + num_merge_cols)]
+
+                # Merged cells are centered, as with Excel's "Merge & Center"
+                if (len(covered) > 1) and not any(label in merged for label in covered):
+                    merged.update(covered)
+                    cell.alignment = Alignment(horizontal='center')
+                    sheet.merge_cells(start_row=row_num, start_column=col_num,
+                                      end_row=row_num + num_merge_rows - 1, end_column=col_num + num_merge_cols - 1)
+
+
+def make_synthetic_workbook(num_sheets, num_rows, num_cols, merge_density=0.0, border_density=0.0, fill_density=0.0,
+                            seed=0):
+    """
+    Create a workbook of synthetic tables (see fill_synthetic_sheet), one table on each worksheet.
+
+    :param num_sheets: number of worksheets in the workbook
+    :param num_rows: number of rows in each table
+    :param num_cols: number of columns in each table
+    :param merge_density: share of the cells that start a merged cell
+    :param border_density: share of the cells with a top or bottom border
+    :param fill_density: share of the cells with a background fill, colored text, or bold/italic text
+    :param seed: seed for the random number generator
+    :return: openpyxl workbook object
+    """
+
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+
+    for sheet_num in range(0, num_sheets):
+        sheet = workbook.create_sheet('table_' + str(sheet_num + 1))
+        fill_synthetic_sheet(sheet, num_rows, num_cols, merge_density, border_density, fill_density, seed + sheet_num)
+
+    return workbook
+
+
+def _time_conversion(input_excel_filename, output_dir, options=None):
+    """
+    Time excel2latexviapython converting a workbook (with its output hidden). Run in a fresh process by
+    bench_excel2latexviapython, so that the peak memory use is that of the conversion alone.
+
+    :param input_excel_filename: path and file name of the excel file
+    :param output_dir: directory to output the TeX files to
+    :param options: [dict] options passed to excel2latexviapython (optional)
+    :return: (fastest time in seconds, peak memory use of the process in MB)
+    """
+
+    def convert():
+        with redirect_stdout(io.StringIO()):
+            e2lvp.excel2latexviapython(input_excel_filename, output_dir, **(options or {}))
+
+    run_time, _ = _time_function(convert)
+
+    return run_time, e2lvp._peak_memory_mb()
+
+
+# BENCHMARKS
+# ======================================================================================================================
+
+def bench_table_dimensions():
+    """
+    Time _get_table_dimensions on a sheet with a small table and num_trailing_rows rows of formatted-but-empty cells.
+
+    :return: [dict] results of the benchmark
+    """
+
+    sheet = make_sheet_with_trailing_format(num_trailing_rows)
+
+    run_time, dims = _time_function(e2lvp._get_table_dimensions, sheet)
+
+    print('_get_table_dimensions (trailing formatted rows)')
+    print('    used range: ' + sheet.calculate_dimension() + ', table found at (row, col, row, col): ' + str(dims))
+    print('    time: %.4f seconds' % run_time)
+
+    return {'seconds': run_time}
+
+
+def bench_sheet_overhead():
+    """
+    Time finding and reading in a small table (_read_sheet_table) on a sheet with num_overhead_rows used rows, with the
+    workbook opened both normally and in read-only (streaming) mode. This is the fixed cost of each sheet, which does
+    not depend on the size of the table.
+
+    :return: [dict] results of the benchmark
+    """
+
+    sheet = make_sheet_with_trailing_format(num_overhead_rows - 10, table_rows=10, table_cols=6)
+
+    results = {}
+
+    print('_read_sheet_table (' + str(num_overhead_rows) + ' used rows, 10 x 6 table)')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        excel_filename = os.path.join(temp_dir, 'overhead.xlsx')
+        sheet.parent.save(excel_filename)
+
+        for name, read_only in (('regular', False), ('streaming', True)):
+            workbook = openpyxl.load_workbook(excel_filename, read_only=read_only, data_only=True)
+
+            run_time, table = _time_function(e2lvp._read_sheet_table, workbook.active)
+
+            print('    %-10s %.4f seconds (table found at %s)' % (name + ':', run_time, table.location))
+
+            results[name] = {'seconds': run_time}
+
+            workbook.close()
+
+    return results
+
+
+def bench_rounding():
+    """
+    Time the rounding of the numbers in num_rounding_cells cells of a table of regression results, both for cells
+    containing text (_round_num_in_str) and for numeric cells (_format_number).
+
+    :return: [dict] results of the benchmark
+    """
+
+    cell_strings, cell_floats = make_stats_table_cells(num_rounding_cells)
+
+    def round_strings():
+        e2lvp._round_num_in_str.cache_clear()  # Time the code including filling the cache
+        return [e2lvp._round_num_in_str(cell, 3) for cell in cell_strings]
+
+    def round_floats():
+        return [e2lvp._format_number(cell, 3) for cell in cell_floats]
+
+    string_time, _ = _time_function(round_strings)
+    float_time, _ = _time_function(round_floats)
+
+    print('_round_num_in_str / _format_number')
+    print('    cells: ' + str(num_rounding_cells))
+    print('    text cells:    %.4f seconds (%.0f cells/sec)' % (string_time, num_rounding_cells / string_time))
+    print('    numeric cells: %.4f seconds (%.0f cells/sec)' % (float_time, num_rounding_cells / float_time))
+
+    return {'text_seconds': string_time, 'text_cells_per_sec': num_rounding_cells / string_time,
+            'numeric_seconds': float_time, 'numeric_cells_per_sec': num_rounding_cells / float_time}
+
+
+def bench_helpers():
+    """
+    Time the helper functions that do most of the work of converting a table (_get_table_dimensions,
+    _tupple2latexstring and _create_horzrule_code) on a synthetic worksheet with merged cells, borders and fills.
+
+    :return: [dict] results of the benchmark
+    """
+
+    sheet = make_synthetic_workbook(1, **helper_sheet_settings).active
+    num_cells = helper_sheet_settings['num_rows'] * helper_sheet_settings['num_cols']
+    usr_settings = {'booktabs': True, 'includetabular': True, 'roundtodp': True, 'numdp': 3}
+
+    # Read in the table, and work out its merged cells and horizontal rules, as excel2latexviapython does
+    table = e2lvp._read_sheet_table(sheet)
+    snapshot = table.snapshot
+    merge_index = e2lvp._get_merged_cells(sheet, snapshot, table.start_row_idx, table.start_col_idx,
+                                          table.merge_ranges)
+    top_rules, bottom_rules = e2lvp._get_rule_map(snapshot, merge_index)
+
+    def create_rows():
+        return [e2lvp._tupple2latexstring(snapshot.row_values(row_num), usr_settings, merge_index.get(row_num, {}),
+                                          row_styles)
+                for row_num, row_styles in enumerate(snapshot.styles)]
+
+    def create_rules():
+        return [e2lvp._create_horzrule_code(e2lvp._combine_rules(bottom_rule, top_rule), usr_settings)
+                for bottom_rule, top_rule in zip(bottom_rules, top_rules)]
+
+    results = {}
+
+    print('Helper functions (%d x %d synthetic table)' % (helper_sheet_settings['num_rows'],
+                                                         helper_sheet_settings['num_cols']))
+
+    for name, fun, args in (('_get_table_dimensions', e2lvp._get_table_dimensions, (sheet,)),
+                            ('_tupple2latexstring', create_rows, ()),
+                            ('_create_horzrule_code', create_rules, ())):
+
+        run_time, _ = _time_function(fun, *args)
+        results[name] = {'seconds': run_time, 'cells_per_sec': num_cells / run_time}
+
+        print('    %-24s %.4f seconds (%.0f cells/sec)' % (name, run_time, num_cells / run_time))
+
+    return results
+
+
+def bench_excel2latexviapython():
+    """
+    Time excel2latexviapython converting each of the synthetic workbooks in workbook_scenarios. Each workbook is
+    converted in a fresh process, so the peak memory use reported is that of converting the workbook alone.
+
+    :return: [dict] results of the benchmark for each scenario
+    """
+
+    results = {}
+
+    print('excel2latexviapython')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, settings, options in workbook_scenarios:
+
+            input_excel_filename = os.path.join(temp_dir, name + '.xlsx')
+            output_dir = os.path.join(temp_dir, name, '')
+            os.makedirs(output_dir)
+
+            make_synthetic_workbook(**settings).save(input_excel_filename)
+
+            # The process is started fresh (rather than forked from this one), so it does not start with the memory
+            # used by this process
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                run_time, peak_memory = executor.submit(_time_conversion, input_excel_filename, output_dir,
+                                                        options).result()
+
+            num_cells = settings['num_sheets'] * settings['num_rows'] * settings['num_cols']
+
+            results[name] = {'settings': settings, 'options': options, 'cells': num_cells, 'seconds': run_time,
+                             'cells_per_sec': num_cells / run_time, 'peak_memory_mb': peak_memory}
+
+            print('    %-12s %8d cells  %.4f seconds (%.0f cells/sec)' % (name, num_cells, run_time,
+                                                                          num_cells / run_time) +
+                  ('' if peak_memory is None else ', peak memory %.1f MB' % peak_memory))
+
+    return results
+
+
+def bench_cache():
+    """
+    Time excel2latexviapython converting a synthetic workbook with the conversion cache, both with an empty cache (every
+    table is converted and added to the cache) and with a full cache (every table is copied from the cache), into a new
+    output directory each time.
+
+    :return: [dict] results of the benchmark
+    """
+
+    results = {}
+    num_cells = cache_workbook_settings['num_sheets'] * cache_workbook_settings['num_rows'] * \
+        cache_workbook_settings['num_cols']
+
+    print('excel2latexviapython with the conversion cache (%d cells)' % num_cells)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_excel_filename = os.path.join(temp_dir, 'cache.xlsx')
+        make_synthetic_workbook(**cache_workbook_settings).save(input_excel_filename)
+
+        def convert(cache_dir):
+            with redirect_stdout(io.StringIO()):
+                e2lvp.excel2latexviapython(input_excel_filename, tempfile.mkdtemp(dir=temp_dir) + os.sep,
+                                           cache_dir=cache_dir)
+
+        for name in ('empty', 'full'):
+            cache_dir = os.path.join(temp_dir, 'cache_' + name)
+
+            if name == 'full':
+                convert(cache_dir)  # Fill the cache
+                run_time, _ = _time_function(convert, cache_dir)
+            else:
+                run_time, _ = _time_function(lambda: convert(tempfile.mkdtemp(dir=temp_dir)))
+
+            results[name] = {'seconds': run_time, 'cells_per_sec': num_cells / run_time}
+
+            print('    %-8s %.4f seconds (%.0f cells/sec)' % (name + ':', run_time, num_cells / run_time))
+
+    return results
+
+
+# COMPARING RESULTS
+# ======================================================================================================================
+
+def _flatten_timings(results, prefix=''):
+    """
+    Find all the timings (in seconds) within the nested dictionary of benchmark results.
+
+    :param results: [dict] results of the benchmarks
+    :param prefix: name of the benchmark the results belong to
+    :return: [dict] seconds taken, keyed by the name of each timing (e.g. "helpers/_tupple2latexstring/seconds")
+    """
+
+    timings = {}
+
+    for key, value in results.items():
+        if isinstance(value, dict):
+            timings.update(_flatten_timings(value, prefix + key + '/'))
+        elif key.endswith('seconds'):
+            timings[prefix + key] = value
+
+    return timings
+
+
+def compare_to_baseline(results, baseline):
+    """
+    Print how each timing compares to the same timing in an earlier run of the benchmarks.
+
+    :param results: [dict] results of this run of the benchmarks
+    :param baseline: [dict] results of the earlier run
+    :return: None
+    """
+
+    timings = _flatten_timings(results['benchmarks'])
+    baseline_timings = _flatten_timings(baseline['benchmarks'])
+
+    print('\nCompared to the baseline (ratio of times, above 1 is slower):')
+
+    for name, seconds in timings.items():
+        if baseline_timings.get(name):
+            print('    %-56s %8.4f -> %8.4f seconds  x%.2f' % (name, baseline_timings[name], seconds,
+                                                               seconds / baseline_timings[name]))
+        else:
+            print('    %-56s %8.4f seconds (not in baseline)' % (name, seconds))
+
+
+def main(argv=None):
+    """
+    Run all the benchmarks, and save and compare the results if asked to.
+
+    :param argv: command line arguments (if None, the arguments the script was run with are used)
+    :return: None
+    """
+
+    parser = argparse.ArgumentParser(description='Benchmarks for Excel2LaTeXviaPython.')
+    parser.add_argument('--output', metavar='FILE', default=None, help='write the results to FILE as JSON')
+    parser.add_argument('--baseline', metavar='FILE', default=None,
+                        help='compare the results to those of an earlier run saved with --output')
+    args = parser.parse_args(argv)
+
+    results = {'python': sys.version.split()[0],
+               'openpyxl': openpyxl.__version__,
+               'num_repeats': num_repeats,
+               'benchmarks': {}}
+
+    results['benchmarks']['table_dimensions'] = bench_table_dimensions()
+    results['benchmarks']['sheet_overhead'] = bench_sheet_overhead()
+    results['benchmarks']['rounding'] = bench_rounding()
+    results['benchmarks']['helpers'] = bench_helpers()
+    results['benchmarks']['excel2latexviapython'] = bench_excel2latexviapython()
+    results['benchmarks']['cache'] = bench_cache()
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file:
+            compare_to_baseline(results, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
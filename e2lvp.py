@@ -1,7 +1,77 @@
 import openpyxl  # Package for reading excel files (.xlsx) into Python
-from itertools import compress
+from openpyxl.cell.read_only import ReadOnlyCell, EmptyCell  # Cells of worksheets opened in read-only mode
+from openpyxl.xml.functions import iterparse  # For reading the worksheet XML directly in read-only mode
+from openpyxl.xml.functions import fromstring  # For reading the theme of the workbook
+from openpyxl.styles.colors import COLOR_INDEX  # Default palette of indexed colors
+from openpyxl.xml.constants import SHEET_MAIN_NS
+from openpyxl.packaging.relationship import get_dependents, get_rels_path  # For finding the Excel tables of a sheet
+from itertools import repeat, chain
+from functools import lru_cache  # For caching the results of converting cell text
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed  # For running work in parallel
 import re  # For reading and processing text strings
-import os  # Use for compiling PDF document
+import os
+import subprocess  # Use for compiling PDF document
+import hashlib  # For detecting which tables have changed since the last run
+import time  # For timing each stage of the conversion
+from contextlib import contextmanager, redirect_stdout
+import json  # For storing the manifest of converted tables
+import uuid  # For naming the temporary files used to write files atomically
+import io  # For reading excel files held in memory
+import filecmp  # For checking if a file written piece by piece has changed
+from fnmatch import fnmatchcase  # For selecting worksheets by name patterns
+import argparse  # For the command line interface
+import glob  # For expanding the file patterns given on the command line
+import sys
+import traceback  # For reporting workbooks that fail to convert on the command line
+import cProfile  # For profiling runs from the command line
+import colorsys  # For applying tints to theme colors
+import weakref  # For keeping the resolved colors of each workbook only while the workbook is open
+
+try:
+    import resource  # For measuring the peak memory use (not available on Windows)
+except ImportError:
+    resource = None
+
+# Name of the file (stored in the output directory) recording the content hash of each table from the last run
+_MANIFEST_FILENAME = 'e2lvp_manifest.json'
+
+# Version of the manifest format. Increase this if a change to the code changes the TeX produced for the same table, so
+# that all tables are re-created on the next run (and the entries of the conversion cache are not reused).
+_MANIFEST_VERSION = 6
+
+# Name of the file (stored in the output directory of each workbook) the command line interface writes the report of
+# the time spent in each stage to
+_REPORT_FILENAME = 'e2lvp_report.json'
+
+# Namespace of the elements of the workbook's theme
+_THEME_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+
+# Names of the colors of the theme's color scheme, in the order they are numbered by theme colors in the workbook (note
+# that Excel numbers the light color of each pair before the dark color)
+_THEME_COLOR_NAMES = ('lt1', 'dk1', 'lt2', 'dk2', 'accent1', 'accent2', 'accent3', 'accent4', 'accent5', 'accent6',
+                      'hlink', 'folHlink')
+
+# User settings that change the TeX code produced for a table
+_TEX_SETTINGS = ('booktabs', 'includetabular', 'roundtodp', 'numdp', 'multitable', 'named_ranges', 'longtable',
+                 'header_rows', 'chunk_rows')
+
+# User settings that change the TeX code of a table once it has been found (the other settings in _TEX_SETTINGS change
+# which tables are found, and how they are split into parts). These are part of the key of a table in the conversion
+# cache.
+_TABLE_TEX_SETTINGS = ('booktabs', 'includetabular', 'roundtodp', 'numdp', 'longtable', 'header_rows')
+
+# Default size limit (in MB) of the conversion cache
+_CACHE_SIZE_MB = 256
+
+# Any character that should not appear in a cell that is a number to be rounded (see _cell_is_value)
+_NOT_VALUE_CHAR_RE = re.compile(r'[^0-9*.()+-eE]')
+
+# Cell contents formatted as ="CONTENTS" (see _clean_cell_str)
+_QUOTED_CONTENTS_RE = re.compile('=".*"')
+
+# Start of the list of merged cells, and each merged cell, in the XML of a worksheet (see _get_merged_cell_ranges)
+_MERGE_CELLS_START_RE = re.compile(rb'<(?:\w+:)?mergeCells[\s>]')
+_MERGE_CELL_REF_RE = re.compile(rb'<(?:\w+:)?mergeCell\s[^>]*?\bref="([^"]*)"')
 
 
 def _is_number(s):
@@ -40,8 +110,7 @@ def _cell_is_value(s):
     :return: True/False: Answers if "s" is from a cell primarily a number
     """
 
-    search_fun = re.compile(r'[^0-9*.()+-eE]').search
-    return not bool(search_fun(s))
+    return _NOT_VALUE_CHAR_RE.search(s) is None
 
 
 def _clean_cell_str(s):
@@ -57,406 +126,521 @@ def _clean_cell_str(s):
         string containing only the true content of the cell
     """
 
-    if re.search('=".*"', s):
+    if _QUOTED_CONTENTS_RE.search(s):
         return s[2:-1]
     else:
         return s
 
 
-def _tupple2latexstring(row_tup, usr_settings, merge_list):
+@lru_cache(maxsize=65536)
+def _classify_cell_str(s):
     """
-    This function converts a tupple of openpyxl CELLs into a single row string
-    of LaTeX code for inclusion in the table. It loops over each cell and appends
-    the appropriate text (representing the LaTeX code) to the string which it
-    returns at the end.
+    Classify the text of a cell: is it a number (that can be rounded), and what is the true content of the cell? Tables
+    often repeat the same cell contents many times, so results are cached.
 
-    :param row_tup: [tupple] contains the openpyxl CELLs for a single row of the table
-    :param usr_settings: [dict] user defined options
-    :param merge_list: list of cells in the row that are merged together
+    :param s: [string] text of the cell
+    :return: (1) True/False: is the cell primarily a number (see _cell_is_value), (2) [string] the true content of the
+    cell (see _clean_cell_str)
+    """
 
-    :return: A string of the row cells formatted in the LaTeX style.
+    return _cell_is_value(s), _clean_cell_str(s)
+
+
+def _cell_value_string(value, usr_settings):
     """
+    Get the text displayed in a cell, applying the d.p. rounding rule to the content if needed.
 
-    num_elements = len(row_tup)  # how many columns we have in the row
+    Numeric cells are handled directly, without searching their text with any regular expressions.
 
-    str_out = ""  # initilise the output string
+    :param value: value of the cell (string, number, None, etc.)
+    :param usr_settings: [dict] user defined options
+    :return: [string] the text to write into the LaTeX table for the cell
+    """
 
-    merge_start_cols = merge_list[0]
-    merge_end_cols = merge_list[1]
-    merge_match_det = merge_list[2]
+    if value is None:
+        # In this case, the cell is empty
+        return " "
 
-    colidx = 0
-    multiidx = 0
+    if isinstance(value, float):
+        # Cell contains a number, so round it directly if needed
+        if usr_settings['roundtodp']:
+            return _format_number(value, usr_settings['numdp'])
+        return str(value)
 
-    while colidx < num_elements:  # for each column/cell in the tupple for the row
+    if isinstance(value, int):
+        # Whole numbers have no d.p. to round (this also covers True/False)
+        return str(value)
 
-        # Check to see if the column/cell is part of a multicolumn/row
+    is_value, clean_str = _classify_cell_str(str(value))
 
-        if colidx in merge_start_cols:
-            # Multicolumn/row
+    if usr_settings['roundtodp'] and is_value:
+        return _round_num_in_str(clean_str, usr_settings['numdp'])
 
-            multcol_indx = merge_start_cols.index(colidx)
-            value_string = _clean_cell_str(merge_match_det[multcol_indx])
+    return clean_str
 
-            colidx = merge_end_cols[multcol_indx]
 
-            multiidx += 1
+def _tupple2latexstring(row_values, usr_settings, row_merges, row_styles, timer=None):
+    """
+    This function converts a row of cells into a single row string
+    of LaTeX code for inclusion in the table. It loops over each cell and appends
+    the appropriate text (representing the LaTeX code) to the string which it
+    returns at the end.
 
-        else:
-            # Get the main text for that cell.
+    :param row_values: [list] the values of the cells in a single row of the table (e.g. a row of the table snapshot)
+    :param usr_settings: [dict] user defined options
+    :param row_merges: [dict] merged cells in the row, keyed by the column of their first cell, giving the column of
+    their last cell and their LaTeX code (see _get_merged_cells)
+    :param row_styles: [list] the _CellStyle of each cell in the row (e.g. a row of the table snapshot)
+    :param timer: [_StageTimer] records the time spent classifying the text of the cells (optional)
 
-            #########
-            # Step 1: Get the "value_string" giving the text displayed in the cell
-            #########
+    :return: A string of the row cells formatted in the LaTeX style.
+    """
 
-            if row_tup[colidx].value is None:
-                # In this case, the cell is empty, so
+    num_elements = len(row_values)  # how many columns we have in the row
 
-                value_string = " "  # Cell is empty of value
+    #########
+    # Step 1: Get the "value_string" giving the text displayed in each cell of the row, and if needed, apply the d.p.
+    # rounding rule to the content.
+    #########
 
-            else:  # Case when the cell contains something
-                # Get content of cell, and if needed, apply the d.p. rounding rule to the content.
-                if usr_settings['roundtodp']:
+    if timer is not None:
+        tic = time.perf_counter()
 
-                    if _cell_is_value(str(row_tup[colidx].value)):
-                        value_string = _round_num_in_str(_clean_cell_str(str(row_tup[colidx].value)),
-                                                         usr_settings['numdp'])
-                    else:
-                        value_string = _clean_cell_str(str(row_tup[colidx].value))
-                else:
-                    value_string = _clean_cell_str(str(row_tup[colidx].value))
+    value_strings = [_cell_value_string(value, usr_settings) for value in row_values]
 
-            #########
-            # Step 2: Apply formatting to the cell's value
-            #########
+    if timer is not None:
+        timer.add('classify', time.perf_counter() - tic)
 
-            # The cell might have special formatting applied to the value inside it (e.g. bold text).
-            # Apply the LaTeX version of this formatting to the string
+    #########
+    # Step 2: Apply formatting to each cell's value. The LaTeX code for the formatting of the cell (e.g. bold text,
+    # colored background) has already been worked out for the cell's style, so just wrap the value in it.
+    #########
 
-            # Apply bold font if needed
-            if row_tup[colidx].font.__dict__['b']:
-                value_string = "\\textbf{" + value_string + "}"
+    if not row_merges:
+        cell_strings = [style.prefix + value_string + style.suffix
+                        for style, value_string in zip(row_styles, value_strings)]
 
-            # Apply italicize if needed
-            if row_tup[colidx].font.__dict__['i']:
-                value_string = "\\textit{" + value_string + "}"
+    else:
+        cell_strings = []
+        colidx = 0
 
-            # Apply font color
-            if isinstance(row_tup[colidx].font.color.rgb, str):
-                value_string = "\\textcolor[HTML]{" + row_tup[colidx].font.color.rgb[2:] + "}{" + value_string + "}"
+        while colidx < num_elements:  # for each column/cell in the tupple for the row
 
-            # Cell background color
-            if isinstance(row_tup[colidx].fill.start_color.index, int):  # built in color
+            # Check to see if the column/cell is part of a multicolumn/row
+            merge = row_merges.get(colidx)
 
-                # Currently cannot handle this case
-                value_string = value_string
+            if merge is not None:
+                # Multicolumn/row
+                colidx, _, value_string = merge
+                cell_strings.append(value_string)
 
             else:
+                style = row_styles[colidx]
+                cell_strings.append(style.prefix + value_strings[colidx] + style.suffix)
 
-                if row_tup[colidx].fill.start_color.index is not '00000000':
-                    value_string = "\\cellcolor[HTML]{" + row_tup[colidx].fill.start_color.index[2:] + "}{" + \
-                                   value_string + "}"
+            colidx += 1
 
-        #########
-        # Step 3: Now that we have to LaTeX code for that cell/column, append it to the string for the entire row.
-        #########
+    #########
+    # Step 3: Now that we have to LaTeX code for each cell/column, join them into the string for the entire row, with
+    # the line ending code for the end of the row string
+    #########
 
-        # Append formatted string for this cell to the string out
-        str_out += value_string
+    return " \t & \t ".join(cell_strings) + " \\\ \n"
 
-        # If this isnt the last element, add cell divider
-        if colidx < num_elements - 1:
-            str_out += " \t & \t "
 
-        colidx += 1
+def _check_for_vline(col_has_border):
+    """
+    Look for vertical lines down the entire length of the column.
 
-    # Now that we have looped over all elements, add on line ending code for the end of the row string
-    str_out += " \\\ \n"
+    We do this by counting how many of the cells in the column have a border on the side we are checking.
 
-    return str_out
+    :param col_has_border: [bytearray] containing 1/0 for each cell in the column indicating whether it has a border on
+    the side being checked (a column of the table snapshot, e.g. snapshot.border_left[colnum])
+    :return: True/False: Does every cell in the column have a border on that side?
+    """
 
+    # Check to see if every row has a border style on that side
+    return col_has_border.count(1) == len(col_has_border)
 
-def _check_for_vline(col_tup, loc):
-    """
-    Look for vertical lines down the entire length of the column.
 
-    We do this by looping over all the cells, and then counting how many of them have a vertical line in location "loc"
+def _rule_runs(cell_has_rule):
+    """
+    Run-length encode a row of horizontal rule flags, giving the first and last column of each unbroken run of cells
+    that have a rule.
 
-    :param col_tup:  [tupple] contains the openpyxl CELLs for a single row of the table
-    :param loc: [string] 'top' or 'bottom'
-    :return:
+    :param cell_has_rule: [bytearray] containing 1/0 for each cell indicating whether the horizontal rule includes it
+    :return: [list] of (first column, last column) of each run, with columns numbered from 1 as in LaTeX
     """
 
-    num_rows = len(col_tup)  # Number of rows in the column
+    runs = []
+
+    num_column = len(cell_has_rule)
+    colind = 0
 
-    count = 0  # Initialise count
+    while True:
+        run_start = cell_has_rule.find(1, colind)  # First cell of the next run
+        if run_start == -1:
+            break
 
-    for rownum in range(0, num_rows):  # For each row
+        run_end = cell_has_rule.find(0, run_start)  # First cell after the run
+        if run_end == -1:
+            run_end = num_column
 
-        # Check to see if there is a border style in location "loc"
-        if col_tup[rownum].border.__dict__[loc].border_style is not None:
-            # Add one to our count
-            count += 1
+        runs.append((run_start + 1, run_end))
 
-    # Check to see if every row has a border style in location "loc"
-    if count == num_rows:
-        return True
-    else:
-        return False
+        colind = run_end
+
+    return runs
 
 
 def _create_cline_code(cell_has_rule_bool, booktabs=False):
     """
     Creates the code for horizontal lines that do not span the entire length of the table, only a few cells.
 
-    :param cell_has_rule_bool: [list] whose elements are True/False for each cell indicating whether the horizontal rule
-    includes this cell.
+    :param cell_has_rule_bool: [bytearray/list] whose elements are 1/0 (True/False) for each cell indicating whether the
+    horizontal rule includes this cell.
     :param booktabs:  True/False. Should the code return code for the booktabs package or regular LaTeX?
 
     :return: A string containing the code needed to draw the horizontal lines.
     E.g. "\cmidrule(r){1-4} \cmidrule(r){6-9} \n"
     """
 
-    # Initialize the output string
-    str_out = ''
+    if booktabs is True:
+        rule_code = '\\cmidrule(r){'
+    else:
+        rule_code = '\\cline{'
 
-    num_column = len(cell_has_rule_bool)  # How many elements in the row
+    # One \cmidrule or \cline for each unbroken run of cells with a rule
+    str_out = ''.join(rule_code + str(run_start) + '-' + str(run_end) + '} \t '
+                      for run_start, run_end in _rule_runs(bytearray(cell_has_rule_bool)))
 
-    # Create a flag to indicate whether we are starting a new cmidrule/cline or not.
-    look_for_new_crule = True  # we are looking for the next True to start a new \cmidrule or \cline
+    # End the LaTeX line and return the string
+    str_out += ' \n'
 
-    for colind in range(0, num_column):  # For each column/cell
+    return str_out
 
-        if (cell_has_rule_bool[colind] is True) & (look_for_new_crule is True):
-            # The current cell has a cmidrule/cline, and we are looking for the next crule. So start a new rule/line in
-            # the LaTeX code
 
-            colnum = colind + 1  # column number is one more than the python index
+def _create_horzrule_code(cell_has_rule, usr_settings):
+    """
+    Create LaTeX code for a horizontal line between two rows of the table (or above the first row/below the last row).
 
-            # Append new line/rule to str_out
-            if booktabs is True:
-                str_out += '\\cmidrule(r){' + str(colnum) + '-'
-            else:
-                str_out += '\\cline{' + str(colnum) + '-'
+    Horizontal lines may either span the entire width of the table, or along a few columns.
 
-            # Turn off flag since now we are going to be looking for where this particular cline ends
-            look_for_new_crule = False
 
-            continue  # Move on to next table cell
+    Args:
+        cell_has_rule: [bytearray] containing 1/0 for each column indicating whether the horizontal line includes it
+                (a row of the rule map, see _get_rule_map).
+
+        usr_settings: [dictionary] user settings - tells us whether to use booktabs code or not.
 
-        elif (cell_has_rule_bool[colind] is False) & (look_for_new_crule is True):
-            # This is the case when we are searching for a new cline to begin, but the current table cell does not
-            # contain a crule, so we carry on looking
-            continue
 
-        elif cell_has_rule_bool[colind] is False:
-            # We have found a column/cell without a cline (=False), and we are looking to close the currently opened
-            # cline/crule as look_for_new_crule=False (because the cases where look_for_new_crule=True are dealt with
-            # by the previous elif case). Therefore, we want to add the LaTeX code to close the current crule/cline
+    Returns:
+        A string containing the LaTeX code needed to draw the horizontal line(s) for that particular row.
+    """
 
-            str_out += str(colind) + '} \t '  # colidx = colnum-1, which is the last column to include
+    num_column = len(cell_has_rule)  # number of columns/elements in this particular row
+    num_with_rule = cell_has_rule.count(1)  # number of columns the horizontal line includes
 
-            look_for_new_crule = True  # Turn flag back on so we are searching for the next crule start
-            continue
+    if num_with_rule == 0:  # If there are no rules and any cell, there is no line here, so return a blank string
 
-        elif (cell_has_rule_bool[colind] is True) & (colind == num_column - 1):
-            # If we get to the end of the table, and the column/cell still has a cline, end the cline.
-            # last one is True
+        return ''
 
-            str_out += str(num_column) + '} \t '
+    else:  # There exists some horizontal rule on at least part of the row, so return the appropriate LaTeX code
 
-    # The above cases exhaust all possibilities, so no need for "else" statement
+        # If user has specified booktabs
+        if usr_settings['booktabs'] is True:
 
-    # End the LaTeX line and return the string
-    str_out += ' \n'
+            if num_with_rule == num_column:
+                return '\\midrule \n'
+            else:
+                return _create_cline_code(cell_has_rule, booktabs=True)
 
-    return str_out
+        else:
+
+            if num_with_rule == num_column:
+                return '\\hline \n'
+            else:
+                return _create_cline_code(cell_has_rule, booktabs=False)
 
 
-def _create_horzrule_code(row_tup, loc, merge_start_cols, merge_end_cols, usr_settings):
+def _get_rule_map(snapshot, merge_index):
     """
-    Create LaTeX code for horizontal lines, above or below (defined by 'loc'), that particular row_tup.
+    Extract which cells of the table have a top and bottom border, for the whole table at once. The rule map is stored
+    as a bytearray of 1/0 flags for each row, which are cheap to combine and run-length encode.
 
-    Horizontal lines may either span the entire width of the table, or along a few columns.
+    Merged cells are masked in bulk: the cells covered by a merge take the border of the first cell of the merge, and
+    there are no borders between the rows inside a merge spanning several rows.
 
+    :param snapshot: [_TableSnapshot] snapshot of the table
+    :param merge_index: [dict] merged cells indexed by row (see _get_merged_cells)
+    :return: (1) [list] of bytearrays flagging the cells in each row with a top border, (2) [list] of bytearrays flagging
+    the cells in each row with a bottom border
+    """
 
-    Args:
-        row_tup: [tuple] a particular row of cells.
+    num_rows = snapshot.num_rows
 
-        loc: [string] either 'top' or 'bottom' to indicate where (relative to this particular
-                row) we should check for any horizontal lines.
+    top_rules = snapshot.rows_of('border_top')
+    bottom_rules = snapshot.rows_of('border_bottom')
 
-        merge_start_cols: [list] the row numbers related to where merged cells start.
+    for row_num, row_merges in merge_index.items():
 
-        merge_end_cols: [list] the row numbers related to where merged cells stop.
+        if not 0 <= row_num < num_rows:  # merge falls outside the table
+            continue
 
-        usr_settings: [dictionary] user settings - tells us whether to use booktabs code or not.
+        for start_col, (end_col, end_row, _) in row_merges.items():
 
+            if start_col < 0:  # merge falls outside the table
+                continue
 
-    Returns:
-        A string containing the LaTeX code needed to draw the horizontal line(s) for that particular row.
-    """
+            num_covered = len(top_rules[row_num][start_col + 1:end_col + 1])
 
-    num_column = len(row_tup)  # number of columns/elements in this particular row
+            # Cells covered by the merge take the border of the first cell of the merge
+            top_rules[row_num][start_col + 1:end_col + 1] = top_rules[row_num][start_col:start_col + 1] * num_covered
+            bottom_rules[row_num][start_col + 1:end_col + 1] = \
+                bottom_rules[row_num][start_col:start_col + 1] * num_covered
 
-    # Step 1: Find which cells have horizontal rules
-    # Construct a list with True/False elements to indicate if the horizontal rule applies to that cell.
+            # No borders between the rows inside the merge
+            if row_num < min(end_row, num_rows - 1):
+                bottom_rules[row_num][start_col:end_col + 1] = bytes(num_covered + 1)
+                top_rules[row_num + 1][start_col:end_col + 1] = bytes(num_covered + 1)
 
-    cell_has_rule = []  # Pre-allocate list
+    return top_rules, bottom_rules
 
-    for colnum in range(0, num_column):  # for each column in the row
 
-        # Check to see if this particular column falls within the span of merged cells
-        # If so, we can ignore it, and use the details from the first cell of the merged cells
-        cond_1 = [colnum > x for x in merge_start_cols]
-        cond_2 = [colnum <= x for x in merge_end_cols]
+def _combine_rules(rule_1, rule_2):
+    """
+    Combine two rows of the rule map, so a cell has a rule if it has one in either. Used to merge the bottom border of a
+    row with the top border of the row below, which look like a single line in Excel.
 
-        cond_combine = []
-        for i in range(0, len(cond_1)):
-            cond_combine.append(cond_1[i] is True and cond_2[i] is True)
+    :param rule_1: [bytearray] of 1/0 flags
+    :param rule_2: [bytearray] of 1/0 flags (the same length as rule_1)
+    :return: [bytearray] of 1/0 flags
+    """
 
-        if any(x is True for x in cond_combine):  # cell is a subsequent merged cell
-            cell_has_rule.append(cell_has_rule[-1])
+    num_column = len(rule_1)
 
-        else:
+    # Treat the flags as one big integer each, so all the columns are combined in a single operation
+    combined = int.from_bytes(rule_1, 'big') | int.from_bytes(rule_2, 'big')
 
-            if row_tup[colnum].border.__dict__[loc].border_style is not None:
-                cell_has_rule.append(True)
-            else:
-                cell_has_rule.append(False)
+    return bytearray(combined.to_bytes(num_column, 'big'))
 
-    if sum(cell_has_rule) == 0:  # If there are no rules and any cell, there is no line here, so return a blank string
 
-        return ''
+def _get_merged_cell_ranges(sheet):
+    """
+    Return the location strings (e.g. "B1:C1") of all the merged cells in the sheet.
 
-    else:  # There exists some horizontal rule on at least part of the row, so return the appropriate LaTeX code
+    Worksheets opened in read-only mode do not keep track of their merged cells, so in this case we read them straight
+    from the worksheet's XML (they are stored in <mergeCell ref="B1:C1"/> elements after the cell data). Rather than
+    parsing all of the cell data to get to them, the raw XML is searched for the start of the list of merged cells (the
+    text "<mergeCell" cannot appear within the cell data, as "<" is always escaped in text).
 
-        # If user has specified booktabs
-        if usr_settings['booktabs'] is True:
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :return: list of location strings of the merged cells
+    """
 
-            if sum(cell_has_rule) == num_column:
-                return '\midrule \n'
-            else:
-                return _create_cline_code(cell_has_rule, booktabs=True)
+    if hasattr(sheet, 'merged_cell_ranges'):
+        return sheet.merged_cell_ranges
 
-        else:
+    with sheet.xml_source as xml_file:
+        tail = b''
 
-            if sum(cell_has_rule) == num_column:
-                return '\hline \n'
-            else:
-                return _create_cline_code(cell_has_rule, booktabs=False)
+        for chunk in iter(lambda: xml_file.read(1024 * 1024), b''):
+            # Keep the end of the last chunk, in case the start of the list was split between the two chunks
+            data = tail + chunk
+            start = _MERGE_CELLS_START_RE.search(data)
 
+            if start is not None:
+                merge_xml = data[start.start():] + xml_file.read()
+                return [ref.decode('utf-8') for ref in _MERGE_CELL_REF_RE.findall(merge_xml)]
 
-def _get_merged_cells(sheet):
-    """
-    Locate all the merged cells within a sheet, return the row and column locations of the start and end, and also
-    return the LaTeX code for the merged cells.
+            tail = data[-64:]
 
-    :param sheet: [tuple] openpyxl excel worksheet object
+    return []
 
-    :return: list containing (1) index of the rows of each merged cells first cell, (2) index of the column of each
-    merged cell first cell, (3) index of the columns of each moerged cells last cell, (4) index of the column of each
-    merged cell last cel, (5) LaTeX code for the
+
+def _get_merged_cells(sheet, snapshot=None, start_row_idx=0, start_col_idx=0, merge_ranges=None):
     """
+    Locate all the merged cells within a sheet, and create the LaTeX code for them. The merged cells are returned as an
+    index keyed by row, so the merged cells in each row of the table can be looked up directly.
+
+    Merged cells spanning several columns are written as a \\multicolumn. Merged cells that also span several rows are
+    written as a \\multirow (inside the \\multicolumn) in their first row, and as an empty \\multicolumn of the same
+    width in each of the rows below, so the other cells of those rows still line up.
 
-    start_row = []
-    start_col = []
+    The first cell of each merge is looked up in the snapshot if it falls within the table (this avoids having to go
+    back to a read-only worksheet, which would re-read the worksheet's XML for every merge).
 
-    end_row = []
-    end_col = []
+    :param sheet: [tuple] openpyxl excel worksheet object
+    :param snapshot: [_TableSnapshot/_TableSummary] snapshot (or summary) of the table (optional). If given, merges are
+    cut off at the edges of the table
+    :param start_row_idx: row number of the upper-left cell of the table
+    :param start_col_idx: column number of the upper-left cell of the table
+    :param merge_ranges: [list] location strings of the merged cells, if already known (see _get_merged_cell_ranges)
+
+    :return: [dict] keyed by the row number (relative to the upper-left cell of the table) of the rows containing merged
+    cells. Each value is a dictionary keyed by the column number (relative to the upper-left cell of the table) of the
+    first cell of each merge in the row, giving (1) the column number of the last cell of the merge, (2) the row number
+    of the last cell of the merge and (3) the LaTeX code for the merged cells.
+    """
 
-    latex_code = []
+    merge_index = {}
 
-    if len(sheet.merged_cell_ranges) == 0:
-        return [[], [], [], [], []]  # No merged cells, so return an empty list
+    if merge_ranges is None:
+        merge_ranges = _get_merged_cell_ranges(sheet)
 
-    for merge_ in sheet.merged_cell_ranges:  # For each merge in the sheet
+    for merge_ in merge_ranges:  # For each merge in the sheet
 
         # Split the location string of the merge, and convert it it to an index number (e.g. "A3")
-        merge_loc_str = re.split(':', merge_)
+        merge_loc_str = merge_.split(':')
 
-        # convert string to col/row index numbers
+        # convert string to row/col index numbers relative to the upper-left cell of the table
         start_coord = openpyxl.utils.coordinate_to_tuple(merge_loc_str[0])
         end_coord = openpyxl.utils.coordinate_to_tuple(merge_loc_str[1])
 
-        start_row.append(start_coord[0] - 1)
-        start_col.append(start_coord[1] - 1)
+        start_row = start_coord[0] - 1 - start_row_idx
+        start_col = start_coord[1] - 1 - start_col_idx
 
-        end_row.append(end_coord[0] - 1)
-        end_col.append(end_coord[1] - 1)
+        end_row = end_coord[0] - 1 - start_row_idx
+        end_col = end_coord[1] - 1 - start_col_idx
 
-        value_string = sheet[merge_loc_str[0]].value
+        # A merge may run past the bottom or right edge of the table (the table is trimmed to the cells that contain
+        # something), so only span the rows and columns of the merge within the table. Otherwise LaTeX would draw the
+        # merged cell beyond the end of the table.
+        if snapshot is not None:
+            end_row = min(end_row, snapshot.num_rows - 1)
+            end_col = min(end_col, snapshot.num_cols - 1)
+
+        # Get the value and formatting of the first cell of the merge (which apply to all of the merged cells)
+        if (snapshot is not None) and (0 <= start_row < snapshot.num_rows) and (0 <= start_col < snapshot.num_cols):
+            value, bold, italic, horizontal = snapshot.cell_format(start_row, start_col)
+        else:
+            first_cell = sheet[merge_loc_str[0]]
+            value = first_cell.value
+            bold = first_cell.font.__dict__['b']
+            italic = first_cell.font.__dict__['i']
+            horizontal = first_cell.alignment.__dict__['horizontal']
+
+        if value is None:
+            value_string = ''
+        else:
+            value_string = _clean_cell_str(str(value))
 
-        if sheet[merge_loc_str[0]].font.__dict__['b']:
+        if bold:
             value_string = "\\textbf{" + value_string + "}"
 
         # Apply italicize if needed
-        if sheet[merge_loc_str[0]].font.__dict__['i']:
+        if italic:
             value_string = "\\textit{" + value_string + "}"
 
-        # Get span of multicolumn
-        multi_col_length = end_coord[1] - start_coord[1] + 1
+        # Get span of multicolumn and multirow
+        multi_col_length = end_col - start_col + 1
+        multi_row_length = end_row - start_row + 1
+
+        if multi_row_length > 1:
+            value_string = '\\multirow{' + str(multi_row_length) + '}{*}{' + value_string + '}'
+
+        # Get alignment (the first letter of left, center or right). Merges without a horizontal alignment (as is usual
+        # for merges spanning several rows), or with one LaTeX has no column type for (e.g. justify), are centered
+        halign = horizontal[0] if horizontal in ('left', 'center', 'right') else 'c'
+
+        multicolumn_str = '\\multicolumn{' + str(multi_col_length) + '}{' + halign + '}{'
 
-        # Get alignment
-        halign = sheet[merge_loc_str[0]].alignment.__dict__['horizontal'][0]  # get the first letter
+        # Add the merge to the index for its first row, and leave an empty space of the same width in the rows below
+        merge_index.setdefault(start_row, {})[start_col] = (end_col, end_row, multicolumn_str + value_string + '}')
 
-        latex_code.append('\multicolumn{' + str(multi_col_length) + '}{' + halign + '}{' + value_string + '}')
+        for row_num in range(start_row + 1, end_row + 1):
+            merge_index.setdefault(row_num, {})[start_col] = (end_col, end_row, multicolumn_str + '}')
 
-    return [start_row, start_col, end_row, end_col, latex_code]
+    return merge_index
 
 
-def _pick_col_text_alignment(col_tup):
+def _has_multirow(merge_index):
+    """
+    Tells us if any of the merged cells span several rows (and so use the multirow package).
+
+    :param merge_index: [dict] merged cells indexed by row (see _get_merged_cells)
+    :return: True/False
+    """
+
+    return any('\\multirow{' in merge_code for row_merges in merge_index.values()
+               for _, _, merge_code in row_merges.values())
+
+
+def _pick_col_text_alignment(col_values, col_haligns):
     """
     For a given column, choose the alignment (left, center, right) based
     on the alignment choice of the majority of the cells
 
 
     Args:
-        col_tup: [tuple] containing a column of the table.
+        col_values: [list] containing the values of the cells in a column of the table.
+
+        col_haligns: [list] containing the horizontal alignment of the cells in the column (None if not specified).
 
     Returns:
         A string ('l'/'c'/'r') indicating the alignment to use
     """
 
-    max_column = len(col_tup)
-
     # Preallocate counters
     count_left = 0
     count_center = 0
     count_right = 0
 
     # Loop over each row, and count the alignment types
-    for rn in range(0, max_column):
+    for value, align_val in zip(col_values, col_haligns):
 
         # If the user doesnt speicify an alignment in Excel, we see the alignment
-        # choice as "None". So let us assign default values. If a number, align
-        # right, if not, align left.
+        # choice as "None". So let us assign default values.
+        if align_val is None:
+            align_val = _default_text_alignment(value)
 
-        if col_tup[rn].alignment.__dict__['horizontal'] is None:
-
-            # Check to see if the value is a number
-            if col_tup[rn].value is None:
-                align_val = 'ignore'
-            elif _is_number(col_tup[rn].value):
-                align_val = 'right'
-            else:
-                align_val = 'left'
-
-        else:
-            align_val = col_tup[rn].alignment.__dict__['horizontal']
-
-        if align_val in ['left']:
+        if align_val == 'left':
 
             count_left += 1
 
-        elif align_val in ['center']:
+        elif align_val == 'center':
 
             count_center += 1
 
-        elif align_val in ['right']:
+        elif align_val == 'right':
 
             count_right += 1
 
+    return _alignment_from_counts(count_left, count_center, count_right)
+
+
+# Position of each alignment in the counts of the alignments of a column (see _TableSummary)
+_ALIGNMENT_COUNT_POS = {'left': 0, 'center': 1, 'right': 2}
+
+
+def _default_text_alignment(value):
+    """
+    Choose the alignment of a cell that has no alignment specified in Excel. If a number, align right, if not, align
+    left. Empty cells are ignored.
+
+    :param value: the value of the cell
+    :return: [string] 'left', 'right' or 'ignore'
+    """
+
+    # Check to see if the value is a number
+    if value is None:
+        return 'ignore'
+    elif _is_number(value):
+        return 'right'
+    else:
+        return 'left'
+
+
+def _alignment_from_counts(count_left, count_center, count_right):
+    """
+    Choose the alignment of a column from the number of its cells aligned left, center and right.
+
+    :param count_left: [int] number of cells aligned left
+    :param count_center: [int] number of cells aligned center
+    :param count_right: [int] number of cells aligned right
+    :return: [string] 'l'/'c'/'r'
+    """
+
     # Find the maximum, in the case of a tie, we break the tie by the order: L,C,R
     max_count = max([count_left, count_center, count_right])
 
@@ -468,10 +652,21 @@ def _pick_col_text_alignment(col_tup):
         return 'r'
 
 
+# Numbers within a string that should be rounded: numbers containing a decimal point (e.g. 0.1234), and numbers in
+# scientific notation without a decimal point (e.g. 1e-05). For numbers in scientific notation with a decimal point
+# (e.g. 7.4568e-05) only the part before the exponent is matched and rounded (giving 7.457e-05). Add a question mark
+# behind the "[.]" of the first pattern to round all numbers (even those without a DP)
+_NUMBER_TO_ROUND_RE = re.compile(r'\d+[.]\d*|\d+e[+-]\d+')
+
+
+@lru_cache(maxsize=65536)
 def _round_num_in_str(str_in, num_dp):
     """
     For a given string, round any number to the appropriate number of d.p.
 
+    Each number is replaced as it is found in a single pass over the string. Tables often repeat the same cell contents
+    many times, so results are cached.
+
     Args:
         str_in: [string] string containing numbers to round
 
@@ -481,39 +676,162 @@ def _round_num_in_str(str_in, num_dp):
         A string where the numbers in str_in have been rounded.
     """
 
-    str_out = str_in
+    str_format = '%.' + str(num_dp) + 'f'
+
+    # For each number found, substitute in the rounded number
+    return _NUMBER_TO_ROUND_RE.sub(lambda match: str_format % float(match.group(0)), str_in)
+
+
+def _format_number(value, num_dp):
+    """
+    Round a number (a python float, as read from a numeric excel cell) to the appropriate number of d.p.
+
+    This gives the same result as _round_num_in_str(str(value), num_dp). Only numbers that python writes in scientific
+    notation need to go through _round_num_in_str; all others are rounded directly, without searching a string for
+    numbers first.
+
+    Args:
+        value: [float] number to round
+
+        num_dp: [scalar] number of decimal places to round the number to
+
+    Returns:
+        A string of the rounded number.
+    """
+
+    str_value = repr(value)
 
-    # Extract a list of all numbers in the string
-    list_found_num_str = re.findall("\d+[.]\d*", str_in)  # Add a question mark behind the "]" to round all numbers
-    # (even those without a DP)
+    if 'e' in str_value:
+        return _round_num_in_str(str_value, num_dp)
 
-    list_found_scientific_num_str = re.findall("\d+[.]*\d*e[+-]\d*", str_in)
+    return '%.*f' % (num_dp, value)
 
-    list_found = list_found_num_str + list_found_scientific_num_str
 
-    # Create a list of the found numbers rounded to the appropriate d.p.
-    list_nums = [float(s) for s in list_found]
+def _scan_sheet_xml(sheet, bordered_styles=None, row_ends_only=False):
+    """
+    Find the occupied cells and the merged cells of a worksheet opened in read-only mode, in a single pass over the
+    worksheet's XML.
+
+    This avoids building a cell object for every cell in the used range of the sheet (which includes any formatted but
+    empty cells beyond the table), and avoids a second pass over the XML to find the merged cells (which are stored
+    after the cell data).
+
+    :param sheet: openpyxl read-only excel worksheet object
+    :param bordered_styles: [set] style numbers (as strings, as in the "s" attribute of the cells) of the cell styles
+    that draw a border. If given, the empty cells with these styles are also found.
+    :param row_ends_only: [bool] only find the first and last occupied cell of each row (the cells of a row are stored
+    in column order). This is all that is needed for the corners of the table, and keeps the list of occupied cells
+    short for tall sheets.
+    :return:    occupied: list of (row number, column number) of the cells that contain something (starting at one), or
+                None if the cells in the XML do not all have a reference (e.g. "B5")
+                bordered: list of (row number, column number) of the empty cells with a border (empty if bordered_styles
+                is not given), or None as for occupied
+                merge_ranges: list of location strings of the merged cells in the sheet
+    """
 
-    str_format = '%.' + str(num_dp) + 'f'
+    cell_tag = '{%s}c' % SHEET_MAIN_NS
+    value_tag = '{%s}v' % SHEET_MAIN_NS
+    inline_string_tag = '{%s}is' % SHEET_MAIN_NS
+    merge_tag = '{%s}mergeCell' % SHEET_MAIN_NS
+    row_tag = '{%s}row' % SHEET_MAIN_NS
 
-    for ii in range(0, len(list_found)):
-        # For each number found, substitute in the rounded number
-        str_out = re.sub(list_found[ii], str_format % list_nums[ii], str_out)
+    occupied_refs = []
+    bordered_refs = []
+    merge_ranges = []
+    row_refs = []  # occupied cells of the current row, if only the ends of each row are kept
 
-    return str_out
+    for _event, element in iterparse(sheet.xml_source):
+        if element.tag == cell_tag:
+            # A cell contains something if it has a value (formulas without a cached value read in as None)
+            if len(element) and (element.find(value_tag) is not None or element.find(inline_string_tag) is not None):
+                (row_refs if row_ends_only else occupied_refs).append(element.get('r'))
+            elif bordered_styles and (element.get('s') in bordered_styles):
+                bordered_refs.append(element.get('r'))
 
+        elif element.tag == row_tag:
+            if row_refs:
+                occupied_refs.extend((row_refs[0], row_refs[-1]) if len(row_refs) > 1 else row_refs)
+                row_refs = []
 
-def _all_nones(iterable):
+        elif element.tag == merge_tag:
+            merge_ranges.append(element.get('ref'))
+
+        element.clear()  # Throw away the parsed element so memory use does not grow with the size of the sheet
+
+    # Cell references are optional in the file format. Let openpyxl work out where the cells are if any are missing
+    if (None in occupied_refs) or (None in bordered_refs):
+        return None, None, merge_ranges
+
+    return [openpyxl.utils.coordinate_to_tuple(ref) for ref in occupied_refs], \
+        [openpyxl.utils.coordinate_to_tuple(ref) for ref in bordered_refs], merge_ranges
+
+
+def _scan_sheet(sheet):
     """
-    Tells us if every value within the tuple iterable is None (missing)
-    :param iterable:
-    :return:
+    Find the location of the table within a worksheet (see _get_table_dimensions) and the merged cells of the worksheet,
+    in a single pass over the sheet.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :return:    dimensions: (start_row_idx, start_col_idx, end_row_idx, end_col_idx) corner cells of the table
+                merge_ranges: list of location strings of the merged cells in the sheet
     """
 
-    for element in iterable:
-        if element.value is not None:
-            return False
-    return True
+    if hasattr(sheet, 'merged_cell_ranges'):
+        # Regular worksheets keep the cells they have created in a dictionary keyed by (row, column). Look through these
+        # directly: going through iter_rows would create (and keep) a blank cell for every empty position in the sheet
+        occupied = [coord for coord, cell in sheet._cells.items() if cell.value is not None]
+        merge_ranges = sheet.merged_cell_ranges
+    else:
+        occupied, _bordered, merge_ranges = _scan_sheet_xml(sheet, row_ends_only=True)
+
+        if occupied is None:
+            return _scan_sheet_rows(sheet), merge_ranges
+
+    # If the sheet turns out to be empty, return the same corner indices as _scan_sheet_rows (the start indices sit past
+    # the end of the sheet and the end indices before the start of it)
+    if not occupied:
+        return (sheet.max_row, sheet.max_column, -1, -1), merge_ranges
+
+    row_nums = [row_num for row_num, _col_num in occupied]
+    col_nums = [col_num for _row_num, col_num in occupied]
+
+    return (min(row_nums) - 1, min(col_nums) - 1, max(row_nums) - 1, max(col_nums) - 1), merge_ranges
+
+
+def _scan_sheet_rows(sheet):
+    """
+    Find the location of the table within a worksheet by reading through the used range of the sheet row by row (see
+    _get_table_dimensions). This is used when the cells cannot be looked through directly (see _scan_sheet).
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :return: (start_row_idx, start_col_idx, end_row_idx, end_col_idx) corner cells of the table
+    """
+
+    # Pre-allocate the corner indices. If the sheet turns out to be empty, these values are returned unchanged (the
+    # start indices sit past the end of the sheet and the end indices before the start of it)
+    start_row_idx = sheet.max_row
+    start_col_idx = sheet.max_column
+    end_row_idx = -1
+    end_col_idx = -1
+
+    # Scan the used range of the sheet once, row by row, and keep track of the outermost cells that contain something.
+    # (Re-building the rows or columns of the sheet for every row/column we trim is quadratic in the size of the sheet,
+    # which is very slow for sheets with lots of formatted but empty cells beyond the table)
+    for row_num, row in enumerate(sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=1,
+                                                  max_col=sheet.max_column)):
+
+        # Column numbers of the cells in this row that contain something
+        occupied_cols = [col_num for col_num, cell in enumerate(row) if cell.value is not None]
+
+        if occupied_cols:
+            # Expand the bounding box so that it includes this row
+            start_row_idx = min(start_row_idx, row_num)
+            end_row_idx = row_num
+
+            start_col_idx = min(start_col_idx, occupied_cols[0])
+            end_col_idx = max(end_col_idx, occupied_cols[-1])
+
+    return start_row_idx, start_col_idx, end_row_idx, end_col_idx
 
 
 def _get_table_dimensions(sheet):
@@ -529,301 +847,3170 @@ def _get_table_dimensions(sheet):
                 end_col_idx: column number of the bottom-right most cell that contains something
     """
 
-    # Pre-allocate starting indices
-    start_col_idx = 0
-    start_row_idx = 0
+    return _scan_sheet(sheet)[0]
 
-    # Pre-allocate end indices (adjust for python starting index at zero, and Excel starting at 1)
-    end_col_idx = sheet.max_column - 1
-    end_row_idx = sheet.max_row - 1
 
-    # Trim off any empty columns at the end of the table
-    for col_num in range(sheet.max_column - 1, -1, -1):
+def _drawn_border_ids(workbook):
+    """
+    Find the borders of a workbook that draw a line on at least one side of the cell.
 
-        if _all_nones(list(sheet.columns)[col_num]):
-            # Trim the column for the sheet
-            end_col_idx = end_col_idx - 1
-        else:
-            # current final column has a value so stop trimming
-            break
+    :param workbook: openpyxl workbook object (regular or read-only)
+    :return: [set] numbers of the borders (their position in the workbook's list of borders) that draw a line
+    """
 
-    # Trim off any empty rows at the end of the table
-    for row_num in range(sheet.max_row - 1, -1, -1):
+    return {border_id for border_id, border in enumerate(workbook._borders)
+            if any((side is not None) and (side.style is not None)
+                   for side in (border.left, border.right, border.top, border.bottom))}
 
-        if _all_nones(list(sheet.rows)[row_num]):
-            # Trim the column for the sheet
-            end_row_idx = end_row_idx - 1
-        else:
-            # current final column has value so stop trimming
-            break
 
-    # Trim off any empty columns at the start of the table
-    for col_num in range(0, sheet.max_column):
+def _scan_sheet_cells(sheet):
+    """
+    Find the cells of a worksheet that are part of a table (the cells that contain something, and the empty cells with a
+    border) and the merged cells of the worksheet, in a single pass over the sheet.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :return:    occupied: list of (row number, column number) of the cells that contain something (starting at one)
+                bordered: list of (row number, column number) of the empty cells with a border
+                merge_ranges: list of location strings of the merged cells in the sheet
+    """
 
-        if _all_nones(list(sheet.columns)[col_num]):
-            # Trim the column for the sheet
-            start_col_idx = start_col_idx + 1
-        else:
-            # current final column has value so stop trimming
-            break
+    drawn_borders = _drawn_border_ids(sheet.parent)
 
-    # Trim off any empty rows at the start of the table
-    for row_num in range(0, sheet.max_row):
+    if hasattr(sheet, 'merged_cell_ranges'):
+        # Look through the cells the worksheet has created directly (see _scan_sheet)
+        occupied = []
+        bordered = []
 
-        if _all_nones(list(sheet.rows)[row_num]):
-            # Trim the column for the sheet
-            start_row_idx = start_row_idx + 1
-        else:
-            # current final column has value so stop trimming
-            break
+        for coord, cell in sheet._cells.items():
+            if cell.value is not None:
+                occupied.append(coord)
+            elif (cell._style is not None) and (cell._style.borderId in drawn_borders):
+                bordered.append(coord)
 
-    return start_row_idx, start_col_idx, end_row_idx, end_col_idx
+        return occupied, bordered, sheet.merged_cell_ranges
 
+    # In the XML, cells refer to their style by its position in the workbook's list of cell styles
+    bordered_styles = {str(style_id) for style_id, style in enumerate(sheet.parent._cell_styles)
+                       if style.borderId in drawn_borders}
 
-def _create_column(table_in, col_idx):
-    """
-    Takes a table and returns a tuple containing only a single column of the table. Useful for analysing a single
-    column of the table
+    occupied, bordered, merge_ranges = _scan_sheet_xml(sheet, bordered_styles)
 
+    if occupied is None:
+        # Let openpyxl work out where the cells are (see _scan_sheet_xml). Only the cells' values are looked at here.
+        occupied = [(row_num, col_num)
+                    for row_num, row in enumerate(sheet.iter_rows(min_row=1, max_row=sheet.max_row, min_col=1,
+                                                                  max_col=sheet.max_column), start=1)
+                    for col_num, cell in enumerate(row, start=1) if cell.value is not None]
+        bordered = []
 
-    :param table_in: table to extract column from
-    :param col_idx: index of the column to be extracted
-    :return: tuple of just column col_idx
+    return occupied, bordered, merge_ranges
+
+
+def _find_table_regions(sheet):
     """
+    Find each of the tables within a worksheet, for worksheets holding more than one table. A table is a block of cells
+    that are connected to each other (including diagonally) through cells that contain something, empty cells with a
+    border, or merged cells. So tables need to be separated by at least one empty row or column without borders.
+
+    The occupied cells of each row are grouped into runs of neighbouring cells, and runs in neighbouring rows that touch
+    are joined together (using union-find). This takes a single pass over the cells of the sheet, so scales linearly
+    with the size of the sheet.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :return:    regions: list of (start_row_idx, start_col_idx, end_row_idx, end_col_idx) corner cells of each table
+                (see _get_table_dimensions), ordered from top to bottom and then left to right. Each table is trimmed
+                to the cells that contain something, and blocks of empty bordered cells are left out.
+                merge_ranges: list of location strings of the merged cells in the sheet
+    """
+
+    occupied, bordered, merge_ranges = _scan_sheet_cells(sheet)
+
+    # Occupancy map of the sheet: the columns of the cells that are part of a table in each row, and whether each cell
+    # contains something
+    row_cells = {}
+
+    for row_num, col_num in bordered:
+        row_cells.setdefault(row_num, {})[col_num] = False
+
+    # Merged cells tie together all of the cells they cover
+    for merge_ in merge_ranges:
+        min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(merge_)
+        for row_num in range(min_row, max_row + 1):
+            row_map = row_cells.setdefault(row_num, {})
+            for col_num in range(min_col, max_col + 1):
+                row_map.setdefault(col_num, False)
+
+    for row_num, col_num in occupied:
+        row_cells.setdefault(row_num, {})[col_num] = True
 
-    nrows = len(table_in)  # number of rows in the table
+    # Group the cells of each row into runs of neighbouring cells. Each run is stored as [first column, last column,
+    # first column containing something, last column containing something] (the last two are None if the run is empty)
+    runs = []
+    row_runs = {}  # Index numbers (within runs) of the runs of each row
 
-    col = []  # preallocate
+    for row_num in sorted(row_cells):
+        row_map = row_cells[row_num]
+        indices = row_runs[row_num] = []
 
-    for row_num in range(0, nrows):
+        for col_num in sorted(row_map):
+            if indices and (runs[indices[-1]][1] == col_num - 1):
+                run = runs[indices[-1]]
+                run[1] = col_num
+            else:
+                indices.append(len(runs))
+                run = [col_num, col_num, None, None]
+                runs.append(run)
+
+            if row_map[col_num]:
+                if run[2] is None:
+                    run[2] = col_num
+                run[3] = col_num
+
+    # Join runs in neighbouring rows that touch (including diagonally). The runs of each row are in order, so the
+    # touching runs of two rows are found by stepping through both rows together.
+    parent = list(range(0, len(runs)))
+
+    def find(run_idx):
+        while parent[run_idx] != run_idx:
+            parent[run_idx] = parent[parent[run_idx]]
+            run_idx = parent[run_idx]
+        return run_idx
+
+    for row_num, indices in row_runs.items():
+        above = row_runs.get(row_num - 1)
+        if not above:
+            continue
+
+        above_pos = 0
+        for run_idx in indices:
+            first_col, last_col = runs[run_idx][0], runs[run_idx][1]
+
+            # Skip the runs of the row above that end too far to the left to touch this run
+            while (above_pos < len(above)) and (runs[above[above_pos]][1] < first_col - 1):
+                above_pos += 1
+
+            pos = above_pos
+            while (pos < len(above)) and (runs[above[pos]][0] <= last_col + 1):
+                parent[find(above[pos])] = find(run_idx)
+                pos += 1
+
+    # Find the corner cells of the cells containing something within each table
+    bounds = {}
+
+    for row_num, indices in row_runs.items():
+        for run_idx in indices:
+            first_value_col, last_value_col = runs[run_idx][2], runs[run_idx][3]
+            if first_value_col is None:
+                continue
+
+            root = find(run_idx)
+            if root in bounds:
+                start_row, start_col, end_row, end_col = bounds[root]
+                bounds[root] = (min(start_row, row_num), min(start_col, first_value_col), max(end_row, row_num),
+                                max(end_col, last_value_col))
+            else:
+                bounds[root] = (row_num, first_value_col, row_num, last_value_col)
 
-        col += [table_in[row_num][col_idx]]
+    regions = sorted((start_row - 1, start_col - 1, end_row - 1, end_col - 1)
+                     for start_row, start_col, end_row, end_col in bounds.values())
 
-    return tuple(col)
+    return regions, merge_ranges
 
 
-def create_pdf_of_tables(workbook, output_dir):
+def _cell_label(row_idx, col_idx):
     """
-    Write and compile a LaTeX document of all the tables contained within the workbook. This is useful way to quickly
-    check all the output looks good
+    Get the excel label of a cell (e.g. "B5") from its row and column index numbers.
 
-    :param workbook: openpyxl workbook object
-    :param output_dir: [string] directory of where the output should be stored
-    :return: none. Complies PDF in output directory
+    :param row_idx: row number of the cell (starting at zero)
+    :param col_idx: column number of the cell (starting at zero)
+    :return: [string] excel label of the cell
     """
 
-    tex_file = open(output_dir + '/output_all_tables.tex', 'w')
+    return openpyxl.utils.get_column_letter(col_idx + 1) + str(row_idx + 1)
 
-    # Write LaTeX preamble
 
-    tex_file.write('\\documentclass[12pt]{article}\n\n')
-    tex_file.write('\\usepackage{booktabs}\n')
-    tex_file.write('\\usepackage[table]{xcolor}\n')
-    tex_file.write('\\usepackage{parskip}\n')
+def _iter_table_rows(sheet, start_row_idx, start_col_idx, end_row_idx, end_col_idx, merge_ranges=None):
+    """
+    Read the cells of the table from the sheet, one row at a time. The rows are generated rather than collected, so the
+    cells of a large table never all need to be held at once (see _TableSnapshot).
+
+    Worksheets opened in read-only mode return a placeholder EmptyCell (which has no formatting) for cells that are not
+    stored in the file. These are replaced with a blank cell with the workbook's default formatting, which is how such
+    cells appear when the workbook is opened normally.
+
+    When a workbook is opened normally, openpyxl removes the cells covered by a merged cell (all but its upper-left
+    cell), so they read as blank cells with the default formatting. In read-only mode they keep the formatting stored in
+    the file (e.g. a border), so they are replaced with blank cells in the same way.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :param start_row_idx: row number of the upper-left cell of the table
+    :param start_col_idx: column number of the upper-left cell of the table
+    :param end_row_idx: row number of the bottom-right cell of the table
+    :param end_col_idx: column number of the bottom-right cell of the table
+    :param merge_ranges: [list] location strings of the merged cells of the sheet (only needed for read-only sheets)
+    :return: generator of a tuple of cells for each row of the table
+    """
 
-    tex_file.write('\n\\begin{document}\n\n')
+    # Columns of the cells covered by a merged cell within each row of the table (only for read-only sheets, as regular
+    # worksheets have already removed them)
+    covered_cols = {}
 
-    # Write Each table to the file
-    flag_first_table = True
-    for sheet_name in workbook.get_sheet_names():
+    if merge_ranges and not hasattr(sheet, 'merged_cell_ranges'):
+        for merge_ in merge_ranges:
+            min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(merge_)
 
-        if flag_first_table is False:
-            tex_file.write('\\newpage\n')
-        else:
-            flag_first_table = False
+            merge_cols = range(max(min_col - 1, start_col_idx), min(max_col - 1, end_col_idx) + 1)
 
-        tex_file.write('Table: ' + sheet_name.replace('_', '\_') + '\n\n')
-        tex_file.write('\\input{' + sheet_name + '.tex}\n\n')
+            for row_idx in range(max(min_row - 1, start_row_idx), min(max_row - 1, end_row_idx) + 1):
+                covered_cols.setdefault(row_idx, set()).update(col_idx for col_idx in merge_cols
+                                                               if (row_idx, col_idx) != (min_row - 1, min_col - 1))
 
-    # Close file
-    tex_file.write('\\end{document}')
-    tex_file.close()
+    for row_idx, row in enumerate(sheet.iter_rows(min_row=start_row_idx + 1, max_row=end_row_idx + 1,
+                                                  min_col=start_col_idx + 1, max_col=end_col_idx + 1),
+                                  start=start_row_idx):
 
-    # Compile PDF and put in output directory
-    os.chdir(output_dir)
-    os.system('pdflatex "' + output_dir + '/output_all_tables.tex"')
+        row_covered = covered_cols.get(row_idx, ())
 
-    # Clean up temp files
-    os.remove(output_dir + '/output_all_tables.aux')
-    os.remove(output_dir + '/output_all_tables.log')
+        if row_covered or any(isinstance(cell, EmptyCell) for cell in row):
+            row = tuple(ReadOnlyCell(sheet, row_idx + 1, col_idx + 1, None)
+                        if isinstance(cell, EmptyCell) or (col_idx in row_covered) else cell
+                        for col_idx, cell in enumerate(row, start=start_col_idx))
 
+        yield row
 
-def excel2latexviapython(input_excel_filename, output_dir, booktabs=True, includetabular=True, roundtodp=True, numdp=3,
-                         makepdf=False):
+
+def _read_theme_colors(theme_xml):
     """
-    This function takes an excel workbook of tables, and creates individual TeX files for the tables found within each
-    worksheet of the workbook.
+    Read the colors of the color scheme of a workbook's theme.
 
-    :param input_excel_filename: [string] path and file name of the excel file containing the tables
-    :param output_dir: [string] path of the directory to output the TeX files to
-    :param booktabs: [True/False] Should booktabs be used rather than regular horizontal rules?
-    :param includetabular: [True/False] Should each table be wrapped in a tabular environment?
-    :param roundtodp: [True/False] Should numbers be rounded to a specific number of decimal places?
-    :param numdp: [Int] How many decimal places to use (only applies is roundtodp=True)
-    :param makepdf: [True/False] Should the code also create a simple PDF document of all the tables?
-    :return: None
+    :param theme_xml: [bytes] XML of the workbook's theme (None if the workbook has no theme)
+    :return: [list] hex code (e.g. "4F81BD") of each theme color, in the order of _THEME_COLOR_NAMES (None for any
+    color missing from the theme)
     """
 
-    # Store the user settings in a dictionary to use
-    usr_settings = {'booktabs': booktabs, 'includetabular': includetabular, 'roundtodp': roundtodp, 'numdp': numdp,
-                    'makepdf': makepdf}
+    theme_colors = [None] * len(_THEME_COLOR_NAMES)
 
-    # PREAMBLE
-    # ==================================================================================================================
+    if not theme_xml:
+        return theme_colors
 
-    # Print output so user can follow progress.
-    print('EXCEL 2 LATEX VIA PYTHON')
-    print('Creates .TeX table files from excel file.')
-    print('\nSource file:      ' + input_excel_filename)
+    try:
+        color_scheme = fromstring(theme_xml).find('{%s}themeElements/{%s}clrScheme' % (_THEME_NS, _THEME_NS))
+    except Exception:  # Leave the theme colors out, rather than fail, if the theme cannot be read
+        return theme_colors
 
-    # Load in the Excel workbook/file
-    workbook = openpyxl.load_workbook(filename=input_excel_filename, data_only=True)
+    if color_scheme is None:
+        return theme_colors
 
-    print('Output directory: ' + output_dir + '\n')
-    print('User settings:')
-    print('    booktabs: ' + str(usr_settings['booktabs']))
-    print('    includetabular: ' + str(usr_settings['includetabular']))
-    print('    roundtodp: ' + str(usr_settings['roundtodp']))
-    print('    numdp: ' + str(usr_settings['numdp']))
-    print('\n')
-    print('Starting to create TeX tables (output name, table location within excel sheet')
+    for color_num, name in enumerate(_THEME_COLOR_NAMES):
+        element = color_scheme.find('{%s}%s' % (_THEME_NS, name))
 
-    # MAIN CODE
-    # ==================================================================================================================
+        if (element is None) or (len(element) == 0):
+            continue
 
-    for sheet_name in workbook.get_sheet_names():  # Loop over every worksheet/tab within the input workbook
+        # The color is either given directly (srgbClr), or is a system color (sysClr) with its last known value
+        hex_code = element[0].get('val') if element[0].tag == '{%s}srgbClr' % _THEME_NS else element[0].get('lastClr')
 
-        # Get the worksheet object for this iteration of the loop
-        sheet = workbook[sheet_name]
+        if hex_code is not None:
+            theme_colors[color_num] = hex_code.upper()
 
-        # The table within the sheet may not start in cell A1. So find the location of the upper-left and bottom-right
-        # corner cells of the table within the sheet
-        start_row_idx, start_col_idx, end_row_idx, end_col_idx = _get_table_dimensions(sheet)
+    return theme_colors
 
-        # Get the excel cell labels of the upper-left and bottom-right cells of the table
-        start_cell_label = list(sheet.rows)[start_row_idx][start_col_idx].column + str(list(sheet.rows)[start_row_idx]
-                                                                                       [start_col_idx].row)
-        end_cell_label = list(sheet.rows)[end_row_idx][end_col_idx].column + str(list(sheet.rows)[end_row_idx]
-                                                                                 [end_col_idx].row)
 
-        # Get the number of columns and rows in the table
-        num_cols = end_col_idx - start_col_idx + 1
-        num_rows = end_row_idx - start_row_idx + 1
+def _apply_tint(hex_code, tint):
+    """
+    Lighten or darken a color by a tint, as Excel does: the luminance of the color is moved towards white (positive
+    tint) or black (negative tint) by the share given by the tint.
 
-        # Trim sheet object down to just the range we care about and store this in a tuple
-        table_tuple = tuple(sheet[start_cell_label:end_cell_label])
+    :param hex_code: [string] hex code of the color (e.g. "4F81BD")
+    :param tint: [float] tint between -1 (black) and 1 (white)
+    :return: [string] hex code of the tinted color
+    """
 
-        # Print to the terminal the name of the table file that is being created this iteration and the excel cells
-        # being used to create it
-        print('    ' + sheet_name + '.tex    ' + list(sheet.rows)[start_row_idx][start_col_idx].column +
-              str(list(sheet.rows)[start_row_idx][start_col_idx].row) + ':'
-              + list(sheet.rows)[end_row_idx][end_col_idx].column + str(list(sheet.rows)[end_row_idx][end_col_idx].row))
+    red, green, blue = (int(hex_code[idx:idx + 2], 16) / 255 for idx in (0, 2, 4))
+    hue, luminance, saturation = colorsys.rgb_to_hls(red, green, blue)
 
-        # Create .tex file we will write to
-        file = open(output_dir + sheet_name + '.tex', 'w')
+    if tint < 0:
+        luminance = luminance * (1 + tint)
+    else:
+        luminance = luminance * (1 - tint) + tint
 
-        # Preamble of the individual table
-        # --------------------------------
+    return '%02X%02X%02X' % tuple(int(round(value * 255)) for value in colorsys.hls_to_rgb(hue, luminance, saturation))
 
-        # If the user requested the booktabs options, add a reminder (as a LaTeX comment) to the top of the table that
-        # the user will need to load up the package in the preamble of their file.
-        if usr_settings['booktabs']:
-            file.write('% Note: make sure \\usepackage{booktabs} is included in the preamble \n')
 
-        file.write('% Note: If your table contains colors, make sure \\usepackage[table]{xcolor} is included in the '
-                   'preamble \n')
+class _ColorResolver(object):
+    """
+    Works out the hex codes of the colors used in a workbook: colors given directly as RGB values, colors from the
+    workbook's indexed palette, and colors from the workbook's theme (with any tint applied). The theme and palette are
+    read once per workbook, and each color is only worked out once.
+    """
 
-        # If the user wants the table rows wrapped in the tabular environment, write the start of the begin environment
-        # command to the output tex file
-        if usr_settings['includetabular']:
+    __slots__ = ('theme_colors', 'indexed_colors', 'resolved', '__weakref__')
 
-            col_align_str = "\\begin{tabular}{"  # Preallocate string
+    def __init__(self, workbook):
+        """
+        :param workbook: openpyxl workbook object
+        """
 
-            # For each column of the table, append to "col_align_str" any vertical dividers and alignment code for the
-            # column
-            for colnum in range(0, num_cols):
+        self.theme_colors = _read_theme_colors(getattr(workbook, 'loaded_theme', None))
+        self.indexed_colors = list(getattr(workbook, '_colors', None) or COLOR_INDEX)
+        self.resolved = {}  # Hex code of each color worked out so far, keyed by the color's type, value and tint
 
-                # Create column to analyze from the table
-                col2a = _create_column(table_tuple, colnum)
+    def resolve(self, color):
+        """
+        Get the hex code of a color.
 
-                # check to see if there is a vline left of column
-                if _check_for_vline(col2a, 'left'):
-                    col_align_str += '|'
+        :param color: openpyxl Color object (or None)
+        :return: [string] hex code of the color (e.g. "FF0000"), or None if the color cannot be worked out (e.g. the
+        "system" colors, or automatic colors)
+        """
 
-                # Choose the alignment (l,c,r) of the column based on the majority of alignments in the column's cells
-                col_align_str += _pick_col_text_alignment(col2a)
+        if color is None:
+            return None
 
-                # check to see if there is a vline right of column
-                if _check_for_vline(col2a, 'right'):
-                    col_align_str += '|'
+        key = (color.type, color.value, color.tint)
 
-            # Create code to write to tex output file
-            begin_str = str(col_align_str) + "} \n"
+        if key not in self.resolved:
+            self.resolved[key] = self._resolve(color)
 
-            # Write the \begin{tabular}{*} code to the tex file
-            file.write(begin_str)
+        return self.resolved[key]
 
-        # Body of the individual table
-        # ----------------------------
+    def _resolve(self, color):
+        """
+        Work out the hex code of a color (see resolve).
+        """
 
-        # Find any merged cells within this particular worksheet
-        merged_details_list = _get_merged_cells(sheet)
+        hex_code = None
 
-        # Adjust the merged_details_list values for the fact that the table might not start in cell A1
-        merged_details_list[0] = [x - start_row_idx for x in merged_details_list[0]]  # start_row
-        merged_details_list[1] = [x - start_col_idx for x in merged_details_list[1]]  # start_col
-        merged_details_list[2] = [x - start_row_idx for x in merged_details_list[2]]  # end_row
-        merged_details_list[3] = [x - start_col_idx for x in merged_details_list[3]]  # end_col
+        if color.type == 'rgb':
+            if isinstance(color.rgb, str):
+                hex_code = color.rgb[-6:]
 
-        # For each row in the table's body create a string containing the tex code for that row and write to the output
-        # file
-        for row_num in range(0, num_rows):
+        elif color.type == 'indexed':
+            if 0 <= color.indexed < len(self.indexed_colors):
+                hex_code = self.indexed_colors[color.indexed][-6:]
 
-            # Generate list of True/False values to see if they match the row
-            elem_picker = [True if item in [row_num] else False for item in merged_details_list[0]]
+        elif color.type == 'theme':
+            if 0 <= color.theme < len(self.theme_colors):
+                hex_code = self.theme_colors[color.theme]
 
-            # Pick out the column number and mutlicolumn/row details corresponding to this row
-            merge_start_cols = list(compress(merged_details_list[1], elem_picker))
-            merge_end_cols = list(compress(merged_details_list[3], elem_picker))
-            merge_match_det = list(compress(merged_details_list[4], elem_picker))
+        # The palette includes the "system" colors, which have no hex code
+        if (hex_code is None) or (re.fullmatch('[0-9A-Fa-f]{6}', hex_code) is None):
+            return None
 
-            # If there is a horizontal rule across all cells at the top, add it to the table
-            hrule_str = _create_horzrule_code(table_tuple[row_num], 'top', merge_start_cols, merge_end_cols,
-                                              usr_settings)
+        if color.tint:
+            hex_code = _apply_tint(hex_code, color.tint)
 
-            # If user requested booktabs, and this is the first row, use toprule rather than midrule
-            if (row_num == 0) & usr_settings['booktabs']:
-                hrule_str = hrule_str.replace('\\midrule', '\\toprule')
+        return hex_code.upper()
 
-            file.write(hrule_str)
 
-            # Get string of rows contents
-            str_2_write = _tupple2latexstring(table_tuple[row_num], usr_settings, [merge_start_cols, merge_end_cols,
-                                                                                   merge_match_det])
+# Color resolver of each open workbook (see _get_color_resolver)
+_color_resolvers = weakref.WeakKeyDictionary()
 
-            # Write row string to file
-            file.write(str_2_write)
 
-            # Add any horizontal rule below the row
-            hrule_str = _create_horzrule_code(table_tuple[row_num], 'bottom', merge_start_cols, merge_end_cols,
-                                              usr_settings)
+def _get_color_resolver(workbook):
+    """
+    Get the color resolver of a workbook, creating it the first time the workbook is seen.
 
-            # If user requested booktabs, and this is the final row, use bottomrule rather than midrule
-            if (row_num == num_rows - 1) & usr_settings['booktabs']:
-                hrule_str = hrule_str.replace('\\midrule', '\\bottomrule')
+    :param workbook: openpyxl workbook object
+    :return: [_ColorResolver] the color resolver of the workbook
+    """
 
-            file.write(hrule_str)
+    resolver = _color_resolvers.get(workbook)
 
-        # Postamble of the individual table
+    if resolver is None:
+        resolver = _color_resolvers[workbook] = _ColorResolver(workbook)
+
+    return resolver
+
+
+class _CellStyle(object):
+    """
+    The formatting of a cell that matters for the TeX code, worked out once for each style used in a table. Cells in a
+    workbook share a small number of styles, so looking up the style of a cell is much quicker than going back to the
+    font, fill, border and alignment of every cell.
+    """
+
+    __slots__ = ('prefix', 'suffix', 'bold', 'italic', 'border_left', 'border_right', 'border_top', 'border_bottom',
+                 'halign', 'hash_key')
+
+    def __init__(self, cell, color_resolver):
+        """
+        :param cell: openpyxl CELL with the style
+        :param color_resolver: [_ColorResolver] color resolver of the cell's workbook
+        """
+
+        font = cell.font
+        fill = cell.fill
+        fill_color = getattr(fill, 'start_color', None)
+        border = cell.border
+
+        self.bold = bool(font.b)
+        self.italic = bool(font.i)
+        self.border_left = border.left.border_style is not None
+        self.border_right = border.right.border_style is not None
+        self.border_top = border.top.border_style is not None
+        self.border_bottom = border.bottom.border_style is not None
+        self.halign = cell.alignment.horizontal  # horizontal alignment (None if not specified)
+
+        # LaTeX code to wrap around the value of the cell to apply its formatting. From the inside out: bold,
+        # italicize, font color, then cell background color.
+        wrappers = []
+
+        # Cell background color (only if the cell has a fill)
+        if getattr(fill, 'fill_type', None) not in (None, 'none'):
+            fill_hex = color_resolver.resolve(fill_color)
+
+            if fill_hex is not None:
+                wrappers.append("\\cellcolor[HTML]{" + fill_hex + "}{")
+
+        # Font color. Colors picked from the theme or the palette that come out as black are the default text color of
+        # the workbook (e.g. "Text 1" of the theme), so are left out to keep the code of plain cells plain.
+        if font.color is not None:
+            font_hex = color_resolver.resolve(font.color)
+
+            if (font_hex is not None) and ((font.color.type == 'rgb') or (font_hex != '000000')):
+                wrappers.append("\\textcolor[HTML]{" + font_hex + "}{")
+
+        if font.__dict__['i']:
+            wrappers.append("\\textit{")
+
+        if font.__dict__['b']:
+            wrappers.append("\\textbf{")
+
+        self.prefix = ''.join(wrappers)
+        self.suffix = '}' * len(wrappers)
+
+        # Description of the style for the content hash of the table. This includes the LaTeX code, as the colors of the
+        # theme are not part of the cell's formatting.
+        self.hash_key = (_cell_style_key(cell), self.prefix)
+
+
+def _style_key(cell):
+    """
+    Get the key of the style of a cell: the index of its shared style in the workbook (read-only mode), or the indexes
+    of its font, fill, border, alignment, etc. in the workbook (None for the default style).
+
+    :param cell: openpyxl CELL (regular or read-only)
+    :return: key of the cell's style
+    """
+
+    style_id = getattr(cell, '_style_id', None)
+
+    if style_id is not None:
+        return style_id
+
+    # Cells that have never had a style set have no style array, and use the default style
+    if cell._style is None:
+        return None
+
+    return tuple(cell._style)
+
+
+def _cell_style(cell, style_cache):
+    """
+    Look up the style of a cell, working it out if it is the first cell seen with the style.
+
+    :param cell: openpyxl CELL (regular or read-only)
+    :param style_cache: [dict] _CellStyle of each style seen so far, keyed by _style_key. Only use a cache for cells of
+    a single workbook, as the keys are indexes into the workbook's styles.
+    :return: [_CellStyle] the style of the cell
+    """
+
+    key = _style_key(cell)
+    style = style_cache.get(key)
+
+    if style is None:
+        style = style_cache[key] = _CellStyle(cell, _get_color_resolver(cell.parent.parent))
+
+    return style
+
+
+class _TableSnapshot(object):
+    """
+    Snapshot of the values and formatting of every cell in a table, taken in a single pass over the cells.
+
+    The snapshot is stored column-major as a struct of arrays: each attribute is a list with an entry for each column of
+    the table, holding the values (or formatting) of the cells in that column from top to bottom. True/False flags are
+    stored in bytearrays. Decisions made for a whole column (alignment, vertical lines) then only need to look at one
+    entry of the snapshot, rather than building a new tuple of cells and going back to openpyxl for every cell.
+
+    The snapshot can be taken directly from the rows as they are read from the sheet (see _iter_table_rows), so the
+    openpyxl cells of the table are not kept once their values and formatting have been copied.
+    """
+
+    __slots__ = ('num_rows', 'num_cols', 'values', 'bold', 'italic', 'border_left', 'border_right', 'border_top',
+                 'border_bottom', 'halign', 'styles')
+
+    def __init__(self, table_rows, style_cache=None):
+        """
+        :param table_rows: [iterable] rows of openpyxl CELLs in the table (e.g. a tuple of rows, or _iter_table_rows)
+        :param style_cache: [dict] _CellStyle of each style seen so far (see _cell_style). If None, a new cache is used.
+        """
+
+        if style_cache is None:
+            style_cache = {}
+
+        table_rows = iter(table_rows)
+        first_row = next(table_rows, ())
+
+        self.num_rows = 0
+        self.num_cols = len(first_row)
+
+        self.values = [[] for _ in range(0, self.num_cols)]  # cell values
+        self.bold = [bytearray() for _ in range(0, self.num_cols)]  # font is bold
+        self.italic = [bytearray() for _ in range(0, self.num_cols)]  # font is italic
+        self.border_left = [bytearray() for _ in range(0, self.num_cols)]  # has a border on the left
+        self.border_right = [bytearray() for _ in range(0, self.num_cols)]  # has a border on the right
+        self.border_top = [bytearray() for _ in range(0, self.num_cols)]  # has a border on the top
+        self.border_bottom = [bytearray() for _ in range(0, self.num_cols)]  # has a border on the bottom
+        self.halign = [[] for _ in range(0, self.num_cols)]  # horizontal alignment (None if not specified)
+        self.styles = []  # _CellStyle of each cell, stored row-major (a list for each row) for creating the rows
+
+        for row in chain((first_row,) if first_row else (), table_rows):
+            row_styles = [_cell_style(cell, style_cache) for cell in row]
+            self.styles.append(row_styles)
+            self.num_rows += 1
+
+            for colnum, (cell, style) in enumerate(zip(row, row_styles)):
+
+                self.values[colnum].append(cell.value)
+                self.bold[colnum].append(style.bold)
+                self.italic[colnum].append(style.italic)
+                self.border_left[colnum].append(style.border_left)
+                self.border_right[colnum].append(style.border_right)
+                self.border_top[colnum].append(style.border_top)
+                self.border_bottom[colnum].append(style.border_bottom)
+                self.halign[colnum].append(style.halign)
+
+    def row_values(self, row_num):
+        """
+        Return the values of the cells in one row of the table.
+
+        :param row_num: [int] row number (relative to the upper-left cell of the table)
+        :return: [list] value of each cell in the row
+        """
+
+        return [column[row_num] for column in self.values]
+
+    def rows_of(self, attribute):
+        """
+        Return one of the bytearray attributes of the snapshot as a list of rows rather than columns.
+
+        :param attribute: [string] name of the attribute (e.g. 'border_top')
+        :return: [list] containing a bytearray for each row of the table
+        """
+
+        return [bytearray(row) for row in zip(*getattr(self, attribute))]
+
+    def cell_format(self, row_num, col_num):
+        """
+        Return the value and formatting of a cell that decide the LaTeX code of a merge starting at the cell.
+
+        :param row_num: [int] row number (relative to the upper-left cell of the table)
+        :param col_num: [int] column number (relative to the upper-left cell of the table)
+        :return: (1) value of the cell, (2) [1/0] is the font bold?, (3) [1/0] is the font italic?, (4) [string]
+        horizontal alignment (None if not specified)
+        """
+
+        return (self.values[col_num][row_num], self.bold[col_num][row_num], self.italic[col_num][row_num],
+                self.halign[col_num][row_num])
+
+    def column_format(self, col_num):
+        """
+        Work out the alignment of a column, and whether it has vertical lines down the entire length of the table.
+
+        :param col_num: [int] column number (relative to the upper-left cell of the table)
+        :return: (1) [True/False] vertical line on the left?, (2) [string] alignment ('l'/'c'/'r'), (3) [True/False]
+        vertical line on the right?
+        """
+
+        # Choose the alignment (l,c,r) of the column based on the majority of alignments in the column's cells
+        return (_check_for_vline(self.border_left[col_num]),
+                _pick_col_text_alignment(self.values[col_num], self.halign[col_num]),
+                _check_for_vline(self.border_right[col_num]))
+
+
+class _TableSummary(object):
+    """
+    Summary of a table, taken in a single pass over its cells without keeping them: its size, the alignment and vertical
+    lines of each column, the value and formatting of the first cell of each merge, and a digest of the values and
+    formatting of all of its cells (see _RowsHash).
+
+    This is all that is needed of the whole table before its rows are created. The rows can then be read from the sheet
+    again a part at a time as they are written (see _TableLatex), rather than holding a snapshot of the whole table.
+
+    If digest_only is True, only the size and the digest of the table are worked out. This is all that is needed to look
+    up the table in the conversion cache (see _cache_key), but the table then has to be read again to create its rows.
+    """
+
+    __slots__ = ('num_rows', 'num_cols', 'align_counts', 'vline_left', 'vline_right', 'merge_cells', 'digest',
+                 'digest_only')
+
+    def __init__(self, table_rows, merge_starts=None, style_cache=None, digest_only=False):
+        """
+        :param table_rows: [iterable] rows of openpyxl CELLs in the table (e.g. _iter_table_rows)
+        :param merge_starts: [dict] column numbers of the first cells of the merges that start in each row, keyed by row
+        number (both relative to the upper-left cell of the table)
+        :param style_cache: [dict] _CellStyle of each style seen so far (see _cell_style). If None, a new cache is used.
+        :param digest_only: [True/False] Should only the size and the digest of the table be worked out?
+        """
+
+        if merge_starts is None:
+            merge_starts = {}
+
+        if style_cache is None:
+            style_cache = {}
+
+        rows_hash = _RowsHash()
+
+        self.num_rows = 0
+        self.num_cols = 0
+        self.align_counts = []  # number of cells aligned left, center and right in each column
+        self.vline_left = []  # does every cell in the column have a border on the left?
+        self.vline_right = []  # does every cell in the column have a border on the right?
+        self.merge_cells = {}  # see cell_format, keyed by (row number, column number) of the first cell of each merge
+
+        for row_num, row in enumerate(table_rows):
+            if row_num == 0:
+                self.num_cols = len(row)
+                self.align_counts = [[0, 0, 0] for _ in range(0, self.num_cols)]
+                self.vline_left = [True] * self.num_cols
+                self.vline_right = [True] * self.num_cols
+
+            row_values = [cell.value for cell in row]
+            row_styles = [_cell_style(cell, style_cache) for cell in row]
+            rows_hash.add_row(row_values, row_styles)
+            self.num_rows += 1
+
+            if digest_only:
+                continue
+
+            for colnum, (value, style) in enumerate(zip(row_values, row_styles)):
+                align_val = style.halign if style.halign is not None else _default_text_alignment(value)
+
+                count_pos = _ALIGNMENT_COUNT_POS.get(align_val)
+                if count_pos is not None:
+                    self.align_counts[colnum][count_pos] += 1
+
+                if not style.border_left:
+                    self.vline_left[colnum] = False
+
+                if not style.border_right:
+                    self.vline_right[colnum] = False
+
+            for colnum in merge_starts.get(row_num, ()):
+                style = row_styles[colnum]
+                self.merge_cells[(row_num, colnum)] = (row_values[colnum], style.bold, style.italic, style.halign)
+
+        self.digest = rows_hash.hexdigest()
+        self.digest_only = digest_only
+
+    def cell_format(self, row_num, col_num):
+        """
+        Return the value and formatting of the first cell of a merge (see _TableSnapshot.cell_format).
+
+        :param row_num: [int] row number (relative to the upper-left cell of the table)
+        :param col_num: [int] column number (relative to the upper-left cell of the table)
+        :return: see _TableSnapshot.cell_format
+        """
+
+        return self.merge_cells[(row_num, col_num)]
+
+    def column_format(self, col_num):
+        """
+        Work out the alignment and vertical lines of a column (see _TableSnapshot.column_format).
+
+        :param col_num: [int] column number (relative to the upper-left cell of the table)
+        :return: see _TableSnapshot.column_format
+        """
+
+        return (self.vline_left[col_num], _alignment_from_counts(*self.align_counts[col_num]),
+                self.vline_right[col_num])
+
+
+def _create_column_spec(snapshot):
+    """
+    Create the column specification of the tabular environment (e.g. "|l|cc|r"), giving the alignment of each column
+    and any vertical lines running down the entire length of the table.
+
+    :param snapshot: [_TableSnapshot/_TableSummary] snapshot (or summary) of the table
+    :return: [string] the column specification
+    """
+
+    col_align_str = ''
+
+    # For each column of the table, append to "col_align_str" any vertical dividers and alignment code for the column
+    for colnum in range(0, snapshot.num_cols):
+        vline_left, col_align, vline_right = snapshot.column_format(colnum)
+
+        # check to see if there is a vline left of column
+        if vline_left:
+            col_align_str += '|'
+
+        col_align_str += col_align
+
+        # check to see if there is a vline right of column
+        if vline_right:
+            col_align_str += '|'
+
+    return col_align_str
+
+
+def _select_sheets(sheet_names, sheets=None, exclude_sheets=None):
+    """
+    Select which worksheets to convert. Worksheets can be given by name, or by glob patterns (e.g. "table_*").
+
+    :param sheet_names: [list] names of all the worksheets in the workbook
+    :param sheets: [string/list] names or patterns of the worksheets to convert. If None, all worksheets are converted
+    :param exclude_sheets: [string/list] names or patterns of worksheets not to convert (applied after sheets)
+    :return: [list] names of the worksheets to convert, in the order they appear in the workbook
+    """
+
+    # Allow a single name or pattern to be given as a string
+    if isinstance(sheets, str):
+        sheets = [sheets]
+    if isinstance(exclude_sheets, str):
+        exclude_sheets = [exclude_sheets]
+
+    selected = []
+
+    for sheet_name in sheet_names:
+        if (sheets is not None) and not any(fnmatchcase(sheet_name, pattern) for pattern in sheets):
+            continue
+        if (exclude_sheets is not None) and any(fnmatchcase(sheet_name, pattern) for pattern in exclude_sheets):
+            continue
+
+        selected.append(sheet_name)
+
+    return selected
+
+
+# Name of the folder (within the output directory) holding the PDFs of the individual tables in preview mode
+_PREVIEW_DIRNAME = 'e2lvp_preview'
+
+# Name of the file (stored in the preview folder) recording the hash of the LaTeX document of each table's PDF
+_PREVIEW_CACHE_FILENAME = 'preview_hashes.json'
+
+
+def _pdf_preamble():
+    """
+    Get the preamble of the LaTeX documents used to check the tables.
+
+    :return: [list] the lines of the preamble, ending with the start of the document
+    """
+
+    return ['\\documentclass[12pt]{article}\n\n',
+            '\\usepackage{booktabs}\n',
+            '\\usepackage[table]{xcolor}\n',
+            '\\usepackage{multirow}\n',
+            '\\usepackage{longtable}\n',
+            '\\usepackage{parskip}\n',
+            '\n\\begin{document}\n\n']
+
+
+def _run_pdflatex(tex_filename, working_dir, timeout):
+    """
+    Compile a LaTeX document with pdflatex, in the given directory, and remove the auxiliary files if it compiles.
+
+    :param tex_filename: [string] file name of the LaTeX document (within working_dir)
+    :param working_dir: [string] directory to run pdflatex in, where the PDF is created
+    :param timeout: [float] seconds to wait for pdflatex before giving up
+    :return: [string] the LaTeX log if the document failed to compile, or None if it compiled
+    """
+
+    base_name = os.path.splitext(tex_filename)[0]
+    log_filename = os.path.join(working_dir, base_name + '.log')
+
+    try:
+        process = subprocess.run(['pdflatex', '-interaction=nonstopmode', '-halt-on-error', tex_filename],
+                                 cwd=working_dir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout)
+    except FileNotFoundError:
+        return 'pdflatex could not be found. Make sure a LaTeX distribution is installed and on the PATH.'
+    except subprocess.TimeoutExpired as error:
+        output = error.output.decode('utf-8', 'replace') if error.output else ''
+        return output + '\npdflatex did not finish within ' + str(timeout) + ' seconds'
+
+    if process.returncode != 0:
+        # Use the full LaTeX log if it was written, as it has more detail than the terminal output
+        try:
+            with open(log_filename, 'r', encoding='utf-8', errors='replace') as file:
+                return file.read()
+        except OSError:
+            return process.stdout.decode('utf-8', 'replace')
+
+    # Clean up temp files
+    for extension in ('.aux', '.log'):
+        if os.path.isfile(os.path.join(working_dir, base_name + extension)):
+            os.remove(os.path.join(working_dir, base_name + extension))
+
+    return None
+
+
+def _compile_table_preview(sheet_name, output_dir, preview_dir, previous_hash, timeout):
+    """
+    Compile the PDF of a single table in preview mode. The table is compiled as its own LaTeX document containing the
+    table's TeX code, unless the document is unchanged since its PDF was last compiled.
+
+    :param sheet_name: [string] name of the worksheet (and TeX file) of the table
+    :param output_dir: [string] directory containing the TeX file of the table
+    :param preview_dir: [string] directory to create the PDF of the table in
+    :param previous_hash: [string] hash of the table's LaTeX document when its PDF was last compiled (None if never)
+    :param timeout: [float] seconds to wait for pdflatex before giving up
+    :return: (1) [string] hash of the table's LaTeX document, (2) [string] the LaTeX log if the table failed to compile
+    (None if it compiled or was unchanged)
+    """
+
+    with open(os.path.join(output_dir, sheet_name + '.tex'), 'r') as file:
+        table_code = file.read()
+
+    tex_parts = _pdf_preamble()
+    tex_parts.append('Table: ' + sheet_name.replace('_', '\\_') + '\n\n')
+    tex_parts.append(table_code + '\n\n')
+    tex_parts.append('\\end{document}')
+    document = ''.join(tex_parts)
+
+    document_hash = hashlib.sha256(document.encode('utf-8')).hexdigest()
+
+    if (document_hash == previous_hash) and os.path.isfile(os.path.join(preview_dir, sheet_name + '.pdf')):
+        return document_hash, None
+
+    _write_tex_file(os.path.join(preview_dir, sheet_name + '.tex'), document)
+
+    log = _run_pdflatex(sheet_name + '.tex', preview_dir, timeout)
+
+    # Don't merge an out of date PDF of a table that no longer compiles
+    if (log is not None) and os.path.isfile(os.path.join(preview_dir, sheet_name + '.pdf')):
+        os.remove(os.path.join(preview_dir, sheet_name + '.pdf'))
+
+    return document_hash, log
+
+
+def create_pdf_of_tables(workbook, output_dir, sheet_names=None, preview=False, jobs=None, timeout=120):
+    """
+    Write and compile a LaTeX document of all the tables contained within the workbook. This is useful way to quickly
+    check all the output looks good
+
+    In preview mode, each table is compiled as its own LaTeX document, in parallel, and the PDFs of the tables are then
+    merged into one (using the pdfpages LaTeX package). The PDFs of the tables are kept in a folder within the output
+    directory, and a table is only re-compiled if its TeX code has changed.
+
+    :param workbook: openpyxl workbook object
+    :param output_dir: [string] directory of where the output should be stored
+    :param sheet_names: [list] names of the tables (and their TeX files) to include. If None, the tables of all the
+    worksheets are included (one table per worksheet, named after the worksheet)
+    :param preview: [True/False] Should each table be compiled separately (in parallel, skipping unchanged tables)?
+    :param jobs: [Int] number of tables to compile at the same time in preview mode (default: number of CPUs)
+    :param timeout: [float] seconds to wait for each run of pdflatex before giving up
+    :return: [dict] the LaTeX log of each document that failed to compile, keyed by the name of the table (or
+    "output_all_tables" for the document of all the tables). Complies PDF in output directory
+    """
+
+    if sheet_names is None:
+        sheet_names = workbook.get_sheet_names()
+
+    failures = {}
+
+    if preview:
+        preview_dir = os.path.join(output_dir, _PREVIEW_DIRNAME)
+        os.makedirs(preview_dir, exist_ok=True)
+
+        # Read the hashes of the documents of the tables when their PDFs were last compiled
+        cache_filename = os.path.join(preview_dir, _PREVIEW_CACHE_FILENAME)
+        try:
+            with open(cache_filename, 'r') as file:
+                previous_hashes = json.load(file)
+        except (OSError, ValueError):
+            previous_hashes = {}
+
+        # Compile the tables in parallel. The work is done by the pdflatex processes, so threads are enough to run them
+        # at the same time.
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+            results = list(executor.map(
+                lambda sheet_name: _compile_table_preview(sheet_name, output_dir, preview_dir,
+                                                          previous_hashes.get(sheet_name), timeout),
+                sheet_names))
+
+        document_hashes = dict(previous_hashes)
+
+        for sheet_name, (document_hash, log) in zip(sheet_names, results):
+            if log is None:
+                document_hashes[sheet_name] = document_hash
+            else:
+                document_hashes.pop(sheet_name, None)
+                failures[sheet_name] = log
+
+        _write_tex_file(cache_filename, json.dumps(document_hashes, indent=4, sort_keys=True))
+
+    # Collect the pieces of the LaTeX document in a list, and write them all to the file at the end
+    tex_parts = _pdf_preamble()
+
+    if preview:
+        # Merge the PDFs of the tables. Tables that failed to compile are replaced by a note.
+        tex_parts.insert(-1, '\\usepackage{pdfpages}\n')
+
+        for sheet_name in sheet_names:
+            if sheet_name in failures:
+                tex_parts.append('Table: ' + sheet_name.replace('_', '\\_') + ' failed to compile. See ' +
+                                 _PREVIEW_DIRNAME.replace('_', '\\_') + '/' + sheet_name.replace('_', '\\_') +
+                                 '.log\n\n\\newpage\n')
+            else:
+                tex_parts.append('\\includepdf[pages=-]{' + _PREVIEW_DIRNAME + '/' + sheet_name + '.pdf}\n')
+
+    else:
+        # Write Each table to the file
+        flag_first_table = True
+        for sheet_name in sheet_names:
+
+            if flag_first_table is False:
+                tex_parts.append('\\newpage\n')
+            else:
+                flag_first_table = False
+
+            tex_parts.append('Table: ' + sheet_name.replace('_', '\\_') + '\n\n')
+            tex_parts.append('\\input{' + sheet_name + '.tex}\n\n')
+
+    # End the document and write the file
+    tex_parts.append('\\end{document}')
+    _write_tex_file(output_dir + '/output_all_tables.tex', ''.join(tex_parts))
+
+    # Compile PDF and put in output directory. pdflatex is run within the output directory, rather than changing the
+    # working directory of the whole process.
+    log = _run_pdflatex('output_all_tables.tex', output_dir, timeout)
+    if log is not None:
+        failures['output_all_tables'] = log
+
+    for name in failures:
+        print('LaTeX failed to compile ' + name + '. The end of the LaTeX log is:')
+        print('\n'.join(failures[name].strip().splitlines()[-10:]))
+
+    return failures
+
+
+def _color_key(color):
+    """
+    Describe an openpyxl color object with a tuple, for use in the content hash of a table.
+
+    :param color: openpyxl Color object (or None)
+    :return: tuple of the type of color (rgb/indexed/theme), its value and its tint
+    """
+
+    if color is None:
+        return None
+
+    return color.type, color.value, color.tint
+
+
+def _cell_style_key(cell):
+    """
+    Describe the formatting of a cell that matters for the TeX code (font, fill, borders and alignment) with a tuple, for
+    use in the content hash of a table.
+
+    :param cell: openpyxl CELL
+    :return: tuple describing the formatting of the cell
+    """
+
+    font = cell.font
+    fill = cell.fill
+    border = cell.border
+
+    return (font.b, font.i, _color_key(font.color),
+            fill.fill_type, _color_key(getattr(fill, 'start_color', None)),
+            border.left.border_style, border.right.border_style, border.top.border_style, border.bottom.border_style,
+            cell.alignment.horizontal)
+
+
+def _hash_table(rows_digest, table_location, merge_ranges, usr_settings):
+    """
+    Create a hash of everything that determines the TeX code of a table: the values and formatting of its cells, the
+    merged cells, and the user settings. If the hash of a table is the same as on the last run, the table's TeX file
+    does not need to be re-created.
+
+    :param rows_digest: [string] digest of the values and formatting of the cells of the table (see _table_digest)
+    :param table_location: [string] location of the table within the excel sheet (e.g. "A1:D6")
+    :param merge_ranges: [list] location strings of the merged cells in the sheet
+    :param usr_settings: [dict] user defined options
+    :return: [string] hex digest of the hash
+    """
+
+    table_hash = hashlib.sha256()
+
+    table_hash.update(repr((_MANIFEST_VERSION, table_location, sorted(merge_ranges),
+                            [usr_settings[key] for key in _TEX_SETTINGS], rows_digest)).encode('utf-8'))
+
+    return table_hash.hexdigest()
+
+
+class _RowsHash(object):
+    """
+    Hash of the values and formatting of the cells of a table, added one row at a time (so it can be worked out as the
+    rows are read, see _TableSummary).
+
+    The styles of the table are numbered in the order they are first used, and each row is added as its values and the
+    numbers of its styles. The description of each style is then only added to the hash once (see hexdigest), rather
+    than for every cell.
+    """
+
+    __slots__ = ('row_hash', 'style_nums', 'object_nums')
+
+    def __init__(self):
+        self.row_hash = hashlib.sha256()
+        self.style_nums = {}  # number of each style, keyed by its description (see _CellStyle.hash_key)
+        self.object_nums = {}  # number of each style, keyed by the id of its _CellStyle (cells share their styles)
+
+    def add_row(self, row_values, row_styles):
+        """
+        Add a row of the table to the hash.
+
+        :param row_values: [list] the values of the cells in the row
+        :param row_styles: [list] the _CellStyle of each cell in the row
+        :return: None
+        """
+
+        row_style_nums = []
+
+        for style in row_styles:
+            style_num = self.object_nums.get(id(style))
+
+            if style_num is None:
+                style_num = self.object_nums[id(style)] = self.style_nums.setdefault(style.hash_key,
+                                                                                     len(self.style_nums))
+
+            row_style_nums.append(style_num)
+
+        self.row_hash.update(repr((row_values, row_style_nums)).encode('utf-8'))
+
+    def hexdigest(self):
+        """
+        :return: [string] hex digest of the hash of the rows added so far, and of the styles they use
+        """
+
+        final_hash = self.row_hash.copy()
+        final_hash.update(repr(list(self.style_nums)).encode('utf-8'))
+
+        return final_hash.hexdigest()
+
+
+def _table_digest(table):
+    """
+    Get the digest of the values and formatting of the cells of a table (see _RowsHash). A summary of the table already
+    holds its digest, which was worked out as the table was read.
+
+    :param table: [_SheetTable] the table
+    :return: [string] hex digest of the hash
+    """
+
+    if table.summary is not None:
+        return table.summary.digest
+
+    snapshot = table.snapshot
+    rows_hash = _RowsHash()
+
+    for row_num, row_styles in enumerate(snapshot.styles):
+        rows_hash.add_row(snapshot.row_values(row_num), row_styles)
+
+    return rows_hash.hexdigest()
+
+
+def _cache_key(table, usr_settings):
+    """
+    Create the key of a table in the conversion cache (see excel2latexviapython): a hash of the values and formatting of
+    its cells, the merged cells that overlap it and the user settings. Unlike _hash_table, the key does not depend on
+    where the table is within its worksheet, so the same table copied into different worksheets and workbooks has the
+    same key.
+
+    :param table: [_SheetTable] the table
+    :param usr_settings: [dict] user defined options
+    :return: [string] hex digest of the hash, or None if the table cannot be cached (a merge that starts outside the
+    table overlaps it, so its TeX code depends on cells outside the table)
+    """
+
+    # Store the merged cells relative to the upper-left cell of the table
+    merges = []
+
+    for merge_ in table.merge_ranges:
+        min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(merge_)
+
+        start_row = min_row - 1 - table.start_row_idx
+        start_col = min_col - 1 - table.start_col_idx
+        end_row = max_row - 1 - table.start_row_idx
+        end_col = max_col - 1 - table.start_col_idx
+
+        # Merges elsewhere on the worksheet do not change the TeX code of the table
+        if not ((start_row < table.num_rows) and (end_row >= 0) and (start_col < table.num_cols) and (end_col >= 0)):
+            continue
+
+        if (start_row < 0) or (start_col < 0):
+            return None
+
+        merges.append((start_row, start_col, end_row, end_col))
+
+    table_hash = hashlib.sha256()
+
+    table_hash.update(repr((_MANIFEST_VERSION, table.num_cols, sorted(merges),
+                            [usr_settings[key] for key in _TABLE_TEX_SETTINGS], _table_digest(table))).encode('utf-8'))
+
+    return table_hash.hexdigest()
+
+
+def _cache_filename(cache_dir, table_key, body_rows):
+    """
+    Get the file name of an entry of the conversion cache, holding the TeX code of a table (or of one part of a table
+    split into several parts, see _table_parts).
+
+    :param cache_dir: [string] path of the directory of the conversion cache
+    :param table_key: [string] key of the table (see _cache_key)
+    :param body_rows: [range] row numbers of the rows below the header rows in the part
+    :return: [string] path and name of the file
+    """
+
+    part_key = hashlib.sha256((table_key + ' ' + str(body_rows.start) + ':' + str(body_rows.stop)).encode('utf-8'))
+
+    return os.path.join(cache_dir, part_key.hexdigest() + '.tex')
+
+
+def _cache_lookup(cache_filename):
+    """
+    Open an entry of the conversion cache, if it is in the cache. The entry is marked as recently used (by updating its
+    modification time), so it is kept over older entries when the cache is trimmed (see _trim_cache).
+
+    :param cache_filename: [string] path and name of the file of the entry (see _cache_filename)
+    :return: file object of the entry opened for reading, or None if the entry is not in the cache
+    """
+
+    try:
+        cache_file = open(cache_filename, 'r')
+    except OSError:
+        return None
+
+    try:
+        os.utime(cache_filename)
+    except OSError:
+        pass  # Another run has just removed the entry while trimming the cache, but it can still be read
+
+    return cache_file
+
+
+def _trim_cache(cache_dir, cache_size_mb):
+    """
+    Remove the least recently used entries of the conversion cache, until the cache is no larger than its size limit.
+    Several runs may share the cache at once, so entries that have already gone are skipped.
+
+    :param cache_dir: [string] path of the directory of the conversion cache
+    :param cache_size_mb: [float] size limit of the cache in MB
+    :return: [Int] number of entries removed
+    """
+
+    entries = []
+
+    for name in os.listdir(cache_dir):
+        # Skip the temporary files of entries that are being written (see _write_tex_file)
+        if name.startswith('.') or not name.endswith('.tex'):
+            continue
+
+        try:
+            stat = os.stat(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+
+        entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+    cache_size = sum(size for _mtime, size, _name in entries)
+    num_removed = 0
+
+    for _mtime, size, name in sorted(entries):
+        if cache_size <= cache_size_mb * 1024 * 1024:
+            break
+
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            continue
+
+        cache_size -= size
+        num_removed += 1
+
+    return num_removed
+
+
+def _hash_file(filename):
+    """
+    Create a hash of the contents of a file.
+
+    :param filename: [string] path and name of the file
+    :return: [string] hex digest of the hash
+    """
+
+    file_hash = hashlib.sha256()
+
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def _read_manifest(output_dir):
+    """
+    Read the manifest of the tables created on the last run from the output directory.
+
+    :param output_dir: [string] path of the directory the TeX files are output to
+    :return: [dict] the manifest, or an empty dictionary if there is no (readable) manifest
+    """
+
+    try:
+        with open(os.path.join(output_dir, _MANIFEST_FILENAME), 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+    if manifest.get('version') != _MANIFEST_VERSION:
+        return {}
+
+    return manifest
+
+
+def _write_manifest(output_dir, workbook_hash, usr_settings, table_hashes, workbook_sheets, selected_sheets,
+                    table_names):
+    """
+    Write the manifest of the tables created on this run to the output directory.
+
+    :param output_dir: [string] path of the directory the TeX files are output to
+    :param workbook_hash: [string] hash of the excel file
+    :param usr_settings: [dict] user defined options
+    :param table_hashes: [dict] hash of each table, keyed by the name of the table's worksheet
+    :param workbook_sheets: [list] names of all the worksheets in the workbook
+    :param selected_sheets: [list] names of the worksheets converted on this run
+    :param table_names: [dict] names of the tables (and their TeX files) of each worksheet, keyed by worksheet name
+    :return: None
+    """
+
+    manifest = {'version': _MANIFEST_VERSION,
+                'workbook': workbook_hash,
+                'settings': {key: usr_settings[key] for key in _TEX_SETTINGS},
+                'sheets': table_hashes,
+                'tables': table_names,
+                'workbook_sheets': workbook_sheets,
+                'selected_sheets': selected_sheets}
+
+    _write_tex_file(os.path.join(output_dir, _MANIFEST_FILENAME), json.dumps(manifest, indent=4, sort_keys=True))
+
+
+def _write_tex_file(filename, text):
+    """
+    Write text to a file, given either as a single string or as an iterable of strings (e.g. the pieces of a table's
+    code as they are created, or the chunks of a file being copied) that are written one after the other, so the whole
+    text never needs to be held in memory. The text is first written to a temporary file in the same folder, which is
+    then renamed over the target file, so the file is never left half-written if the code is interrupted. If the file
+    already contains exactly this text, it is left untouched (so its modification time does not change): a string is
+    compared to the file before writing, and an iterable once it has all been written to the temporary file.
+
+    :param filename: [string] path and name of the file
+    :param text: [string] text to write to the file, or [iterable] strings to write one after the other
+    :return: True/False: was the file written? (False if it was already up to date)
+    """
+
+    streamed = not isinstance(text, str)
+
+    if not streamed:
+        try:
+            with open(filename, 'r') as file:
+                if file.read() == text:
+                    return False
+        except (OSError, UnicodeDecodeError):
+            pass  # The file does not exist yet (or cannot be read), so write it
+
+        text = (text,)
+
+    folder, name = os.path.split(os.path.abspath(filename))
+
+    # Unique name for the temporary file (created like any other file, so it gets the usual file permissions)
+    temp_filename = os.path.join(folder, '.' + name + '.' + uuid.uuid4().hex + '.tmp')
+
+    try:
+        with open(temp_filename, 'x') as file:
+            for piece in text:
+                file.write(piece)
+
+        # Text written piece by piece can only be compared to the file once it has all been written
+        if streamed and os.path.isfile(filename) and filecmp.cmp(temp_filename, filename, shallow=False):
+            os.remove(temp_filename)
+            return False
+
+        os.replace(temp_filename, filename)
+
+    except BaseException:
+        # Do not leave the temporary file lying around if something went wrong
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+    return True
+
+
+class _StageTimer(object):
+    """
+    Keeps a running total of the time spent in each stage of the conversion (e.g. finding the table dimensions, writing
+    the rows of the tables), so we can see where the time goes. Also keeps a record of each worksheet converted (its
+    number of cells, the time spent in each stage, and the peak memory use of the process that converted it).
+    """
+
+    __slots__ = ('stage_times', 'sheets')
+
+    def __init__(self):
+        self.stage_times = {}  # Total seconds spent in each stage, in the order the stages were first run
+        self.sheets = []  # Record of each worksheet converted (see add_sheet)
+
+    def add(self, stage, seconds):
+        """
+        Add time to the running total of a stage.
+
+        :param stage: [string] name of the stage
+        :param seconds: [float] time spent in the stage
+        """
+
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+
+    def merge(self, stage_times):
+        """
+        Add the stage times recorded by another timer (e.g. one in a worker process) to this timer.
+
+        :param stage_times: [dict] seconds spent in each stage
+        """
+
+        for stage, seconds in stage_times.items():
+            self.add(stage, seconds)
+
+    def add_sheet(self, sheet_name, table_location, unchanged, stage_times, peak_memory):
+        """
+        Record a converted worksheet, and add the time spent in each stage converting it to the running totals.
+
+        :param sheet_name: [string] name of the worksheet
+        :param table_location: [string] location of the table within the excel sheet (e.g. "A1:D6")
+        :param unchanged: [True/False] was the TeX file left untouched as the table is unchanged?
+        :param stage_times: [dict] seconds spent in each stage converting the worksheet
+        :param peak_memory: [float] peak memory use (in MB) of the process that converted the worksheet, over the
+        life of the process up to the end of converting it (None if it cannot be measured). This is a high-water mark,
+        so it includes the workbook and any worksheets converted before this one, not just this worksheet.
+        :return: [dict] the record of the worksheet
+        """
+
+        self.merge(stage_times)
+
+        record = {'sheet': sheet_name,
+                  'location': table_location,
+                  'cells': _location_num_cells(table_location),
+                  'unchanged': unchanged,
+                  # Classifying the text of cells happens while creating the rows, so is not counted twice
+                  'seconds': sum(seconds for stage, seconds in stage_times.items() if stage != 'classify'),
+                  'stages': dict(stage_times),
+                  # The process-wide high-water mark, not the memory used by this worksheet alone
+                  'process_peak_memory_mb': peak_memory}
+
+        self.sheets.append(record)
+
+        return record
+
+    def peak_memory(self):
+        """
+        :return: [float] the peak memory use (in MB) of this process and the worker processes that converted the
+        worksheets (None if it cannot be measured)
+        """
+
+        peaks = [record['process_peak_memory_mb'] for record in self.sheets] + [_peak_memory_mb()]
+        peaks = [peak for peak in peaks if peak is not None]
+
+        return max(peaks) if peaks else None
+
+    def to_dict(self):
+        """
+        :return: [dict] the time spent in each stage, the record of each worksheet, and the peak memory use
+        """
+
+        return {'stages': dict(self.stage_times),
+                'cells': sum(record['cells'] for record in self.sheets),
+                'sheets': list(self.sheets),
+                'peak_memory_mb': self.peak_memory()}
+
+    def report(self):
+        """
+        Print the time spent in each stage to the terminal.
+        """
+
+        print('\nTime spent in each stage (seconds):')
+
+        for stage, seconds in self.stage_times.items():
+            if stage == 'classify':
+                continue
+
+            print('    %-24s %10.4f' % (stage, seconds))
+
+            # Classifying the text of cells happens while creating the rows, so it is already included in "rows"
+            if (stage == 'rows') and ('classify' in self.stage_times):
+                print('    %-24s %10.4f' % ('  (text classification)', self.stage_times['classify']))
+
+        peak_memory = self.peak_memory()
+        if peak_memory is not None:
+            print('\nPeak memory use: %.1f MB' % peak_memory)
+
+
+def _peak_memory_mb():
+    """
+    Get the peak memory use (resident set size) of the current process.
+
+    :return: [float] peak memory use in MB (None if it cannot be measured on this platform)
+    """
+
+    # On Linux, read the peak from /proc. Unlike getrusage, this is not carried over from the parent process when a
+    # process is started (e.g. the worker processes).
+    try:
+        with open('/proc/self/status', 'r') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS, and in kilobytes on other platforms
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+
+    return peak / 1024
+
+
+@contextmanager
+def _time_stage(timer, stage):
+    """
+    Time the code run within the "with" block, and add it to the running total of the stage. Does nothing if timer is
+    None.
+
+    :param timer: [_StageTimer] timer to record the time in (or None)
+    :param stage: [string] name of the stage
+    """
+
+    if timer is None:
+        yield
+        return
+
+    tic = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        timer.add(stage, time.perf_counter() - tic)
+
+
+class _SheetTable(object):
+    """
+    A table read from a worksheet: a snapshot (or a summary, see _read_table) of the cells of the table, where the table
+    is within the worksheet, and the merged cells of the worksheet.
+    """
+
+    __slots__ = ('sheet', 'snapshot', 'summary', 'num_rows', 'num_cols', 'start_row_idx', 'start_col_idx', 'location',
+                 'merge_ranges')
+
+    def __init__(self, sheet, snapshot, start_row_idx, start_col_idx, location, merge_ranges, summary=None):
+        """
+        :param sheet: openpyxl excel worksheet object (regular or read-only) containing the table
+        :param snapshot: [_TableSnapshot] values and formatting of the cells in the table (None if only a summary of the
+        cells was taken)
+        :param start_row_idx: row number of the upper-left cell of the table
+        :param start_col_idx: column number of the upper-left cell of the table
+        :param location: [string] location of the table within the excel sheet (e.g. "A1:D6")
+        :param merge_ranges: [list] location strings of the merged cells in the sheet
+        :param summary: [_TableSummary] summary of the cells in the table, if a snapshot was not taken
+        """
+
+        self.sheet = sheet
+        self.snapshot = snapshot
+        self.summary = summary
+        self.num_rows = (snapshot or summary).num_rows
+        self.num_cols = (snapshot or summary).num_cols
+        self.start_row_idx = start_row_idx
+        self.start_col_idx = start_col_idx
+        self.location = location
+        self.merge_ranges = merge_ranges
+
+
+def _read_table(sheet, start_row_idx, start_col_idx, end_row_idx, end_col_idx, merge_ranges, max_snapshot_rows=None,
+                digest_only=False):
+    """
+    Read in the cells of a table, taking a snapshot of them as they are read (see _TableSnapshot).
+
+    Tables with more than max_snapshot_rows rows are only summarized as they are read (see _TableSummary), and their
+    rows are read again a part at a time as the table is written (see _TableLatex). This takes a second pass over the
+    cells of the table, but the cells of a table split into several parts (see _table_parts) are then never all held in
+    memory at once.
+
+    If digest_only is True, only the digest of a table that is not summarized is worked out, rather than taking a
+    snapshot. This is quicker if the table is then found in the conversion cache, and otherwise the table is read again
+    (see _reread_table).
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the table
+    :param start_row_idx: row number of the upper-left cell of the table
+    :param start_col_idx: column number of the upper-left cell of the table
+    :param end_row_idx: row number of the bottom-right cell of the table
+    :param end_col_idx: column number of the bottom-right cell of the table
+    :param merge_ranges: [list] location strings of the merged cells of the table
+    :param max_snapshot_rows: [int] number of rows of the largest table to take a snapshot of (if None, no limit)
+    :param digest_only: [True/False] Should only the digest of a table be worked out, rather than taking a snapshot?
+    :return: [_SheetTable] the table
+    """
+
+    table_location = _cell_label(start_row_idx, start_col_idx) + ':' + _cell_label(end_row_idx, end_col_idx)
+    table_rows = _iter_table_rows(sheet, start_row_idx, start_col_idx, end_row_idx, end_col_idx, merge_ranges)
+
+    if (max_snapshot_rows is None) or (end_row_idx - start_row_idx + 1 <= max_snapshot_rows):
+        if digest_only:
+            return _SheetTable(sheet, None, start_row_idx, start_col_idx, table_location, merge_ranges,
+                               summary=_TableSummary(table_rows, digest_only=True))
+
+        return _SheetTable(sheet, _TableSnapshot(table_rows), start_row_idx, start_col_idx, table_location,
+                           merge_ranges)
+
+    # The first cell of each merge that starts within the table is kept in the summary (see _get_merged_cells)
+    merge_starts = {}
+
+    for merge_ in merge_ranges:
+        if _range_starts_within(merge_, start_row_idx, start_col_idx, end_row_idx, end_col_idx):
+            min_col, min_row, _max_col, _max_row = openpyxl.utils.range_boundaries(merge_)
+            merge_starts.setdefault(min_row - 1 - start_row_idx, []).append(min_col - 1 - start_col_idx)
+
+    return _SheetTable(sheet, None, start_row_idx, start_col_idx, table_location, merge_ranges,
+                       summary=_TableSummary(table_rows, merge_starts))
+
+
+def _reread_table(table, max_snapshot_rows=None):
+    """
+    Read in the cells of a table again, if only the digest of its cells was worked out when it was first read (see
+    _read_table), so that its TeX code can be created.
+
+    :param table: [_SheetTable] the table
+    :param max_snapshot_rows: [int] number of rows of the largest table to take a snapshot of (see _read_table)
+    :return: [_SheetTable] the table, with a snapshot (or summary) of its cells
+    """
+
+    if (table.summary is None) or (not table.summary.digest_only):
+        return table
+
+    min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(table.location)
+
+    return _read_table(table.sheet, min_row - 1, min_col - 1, max_row - 1, max_col - 1, table.merge_ranges,
+                       max_snapshot_rows)
+
+
+def _read_sheet_table(sheet, timer=None, max_snapshot_rows=None, digest_only=False):
+    """
+    Find the table within a worksheet, and read in its cells and the merged cells of the worksheet.
+
+    The sheet is looked through once to find both the table and the merged cells (see _scan_sheet), and then only the
+    cells of the table are read in.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the table
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :param max_snapshot_rows: [int] number of rows of the largest table to take a snapshot of (see _read_table)
+    :param digest_only: [True/False] Should only the digest of a table be worked out, rather than taking a snapshot?
+    :return: [_SheetTable] the table, or None if the worksheet is empty
+    """
+
+    # The table within the sheet may not start in cell A1. So find the location of the upper-left and bottom-right
+    # corner cells of the table within the sheet. The merged cells within this particular worksheet are found in the
+    # same pass over the sheet
+    with _time_stage(timer, 'dimensions'):
+        (start_row_idx, start_col_idx, end_row_idx, end_col_idx), merge_ranges = _scan_sheet(sheet)
+
+    # An empty worksheet has no table (its end indices are before the start of the sheet, see _scan_sheet)
+    if end_row_idx < 0:
+        return None
+
+    with _time_stage(timer, 'read'):
+        # Only keep the merged cells that overlap the table (merges elsewhere on the worksheet do not change its code)
+        merge_ranges = [merge_ for merge_ in merge_ranges
+                        if _range_overlaps(merge_, start_row_idx, start_col_idx, end_row_idx, end_col_idx)]
+
+        # Trim sheet object down to just the range we care about, and take a snapshot of its cells as they are read
+        return _read_table(sheet, start_row_idx, start_col_idx, end_row_idx, end_col_idx, merge_ranges,
+                           max_snapshot_rows, digest_only)
+
+
+def _get_excel_tables(sheet):
+    """
+    Find the Excel tables (created with Insert > Table) on a worksheet.
+
+    Worksheets opened in read-only mode do not load their Excel tables, so in this case we read them straight from the
+    excel file: the worksheet's relationships list the files holding its tables.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :return: [list] (name, location string (e.g. "B2:D10")) of each Excel table on the worksheet
+    """
+
+    if hasattr(sheet, '_tables'):
+        return [(table.displayName, table.ref) for table in sheet._tables]
+
+    archive = sheet.parent._archive
+
+    try:
+        relationships = get_dependents(archive, get_rels_path(sheet.worksheet_path))
+    except KeyError:  # The worksheet has no relationships, so no tables
+        return []
+
+    tables = []
+
+    for relationship in relationships.Relationship:
+        if relationship.Type.endswith('/table'):
+            table_xml = fromstring(archive.read(relationship.target))
+            tables.append((table_xml.get('displayName'), table_xml.get('ref')))
+
+    return tables
+
+
+def _get_named_ranges(sheet):
+    """
+    Find the defined names (created with Formulas > Define Name) and Excel tables that refer to a range of cells on a
+    worksheet.
+
+    Defined names that refer to more than one range, to constants or formulas, or that are hidden or built into Excel
+    (e.g. the print area) are left out. Defined names that only apply within one worksheet are named after the worksheet
+    and the name (e.g. "results_coef"), as the same name may be used on other worksheets. Defined names that refer to
+    whole columns or rows are limited to the used range of the worksheet (see _bounded_location).
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :return: [list] (name, location string (e.g. "B2:D10")) of each range: the defined names, in the order they are
+    stored in the workbook, followed by the Excel tables of the worksheet
+    """
+
+    workbook = sheet.parent
+    sheet_index = workbook.sheetnames.index(sheet.title)
+
+    named_ranges = []
+
+    for defined_name in workbook.defined_names.definedName:
+        if defined_name.hidden or defined_name.name.startswith('_xlnm.') or (defined_name.type != 'RANGE'):
+            continue
+
+        if (defined_name.localSheetId is not None) and (int(defined_name.localSheetId) != sheet_index):
+            continue
+
+        destinations = list(defined_name.destinations)
+        if (len(destinations) != 1) or (destinations[0][0] != sheet.title):
+            continue
+
+        location = _bounded_location(sheet, destinations[0][1].replace('$', ''))
+        if location is None:
+            continue
+
+        name = defined_name.name
+        if defined_name.localSheetId is not None:
+            name = sheet.title + '_' + name
+
+        named_ranges.append((name, location))
+
+    return named_ranges + _get_excel_tables(sheet)
+
+
+def _bounded_location(sheet, location):
+    """
+    Limit a range of whole columns (e.g. "A:A") or whole rows (e.g. "2:3") to the used range of the worksheet, so that
+    the range has an upper-left and a bottom-right cell.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only)
+    :param location: [string] location string of the range of cells (e.g. "B2:D10", "A:C" or "2:3")
+    :return: [string] location string of the range with all four of its bounds (e.g. "A1:C20"), or None if the range
+    has open bounds and the used range of the worksheet is not known (e.g. a read-only worksheet without a stored
+    dimension)
+    """
+
+    min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(location)
+
+    if None not in (min_col, min_row, max_col, max_row):
+        return location
+
+    if min_row is None:
+        min_row, max_row = sheet.min_row, sheet.max_row
+
+    if min_col is None:
+        min_col, max_col = sheet.min_column, sheet.max_column
+
+    if None in (min_col, min_row, max_col, max_row):
+        return None
+
+    return _cell_label(min_row - 1, min_col - 1) + ':' + _cell_label(max_row - 1, max_col - 1)
+
+
+def _read_named_tables(sheet, timer=None, max_snapshot_rows=None, digest_only=False):
+    """
+    Read in the cells of the defined names and Excel tables on a worksheet (see _get_named_ranges). Only the cells of
+    these ranges are read, so the rest of the worksheet is never looked through.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the tables
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :param max_snapshot_rows: [int] number of rows of the largest table to take a snapshot of (see _read_table)
+    :param digest_only: [True/False] Should only the digest of a table be worked out, rather than taking a snapshot?
+    :return: (1) [list] names of the tables, (2) [list] _SheetTable of each table
+    """
+
+    with _time_stage(timer, 'dimensions'):
+        named_ranges = _get_named_ranges(sheet)
+
+    table_names = []
+    tables = []
+
+    with _time_stage(timer, 'read'):
+        merge_ranges = _get_merged_cell_ranges(sheet) if named_ranges else []
+
+        for table_name, location in named_ranges:
+            min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(location)
+            start_row_idx, start_col_idx, end_row_idx, end_col_idx = min_row - 1, min_col - 1, max_row - 1, max_col - 1
+
+            # Only keep the merged cells that start within this table
+            table_merges = [merge_ for merge_ in merge_ranges
+                            if _range_starts_within(merge_, start_row_idx, start_col_idx, end_row_idx, end_col_idx)]
+
+            table_names.append(table_name)
+            tables.append(_read_table(sheet, start_row_idx, start_col_idx, end_row_idx, end_col_idx, table_merges,
+                                      max_snapshot_rows, digest_only))
+
+    return table_names, tables
+
+
+def _range_starts_within(location, start_row_idx, start_col_idx, end_row_idx, end_col_idx):
+    """
+    Check if the upper-left cell of a range of cells is within a table.
+
+    :param location: [string] location string of the range of cells (e.g. "B1:C1")
+    :param start_row_idx: row number of the upper-left cell of the table
+    :param start_col_idx: column number of the upper-left cell of the table
+    :param end_row_idx: row number of the bottom-right cell of the table
+    :param end_col_idx: column number of the bottom-right cell of the table
+    :return: True/False
+    """
+
+    min_col, min_row, _max_col, _max_row = openpyxl.utils.range_boundaries(location)
+
+    return (start_row_idx < min_row <= end_row_idx + 1) and (start_col_idx < min_col <= end_col_idx + 1)
+
+
+def _range_overlaps(location, start_row_idx, start_col_idx, end_row_idx, end_col_idx):
+    """
+    Check if a range of cells overlaps a table.
+
+    :param location: [string] location string of the range of cells (e.g. "B1:C1")
+    :param start_row_idx: row number of the upper-left cell of the table
+    :param start_col_idx: column number of the upper-left cell of the table
+    :param end_row_idx: row number of the bottom-right cell of the table
+    :param end_col_idx: column number of the bottom-right cell of the table
+    :return: True/False
+    """
+
+    min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(location)
+
+    return (min_row <= end_row_idx + 1) and (max_row > start_row_idx) and (min_col <= end_col_idx + 1) and \
+        (max_col > start_col_idx)
+
+
+def _read_sheet_tables(sheet, timer=None, max_snapshot_rows=None, digest_only=False):
+    """
+    Find each of the tables within a worksheet holding more than one table (see _find_table_regions), and read in their
+    cells and merged cells.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the tables
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :param max_snapshot_rows: [int] number of rows of the largest table to take a snapshot of (see _read_table)
+    :param digest_only: [True/False] Should only the digest of a table be worked out, rather than taking a snapshot?
+    :return: [list] _SheetTable of each table, ordered from top to bottom and then left to right (empty if the worksheet
+    is empty)
+    """
+
+    with _time_stage(timer, 'dimensions'):
+        regions, merge_ranges = _find_table_regions(sheet)
+
+    tables = []
+
+    with _time_stage(timer, 'read'):
+        for start_row_idx, start_col_idx, end_row_idx, end_col_idx in regions:
+
+            # Only keep the merged cells that start within this table
+            table_merges = [merge_ for merge_ in merge_ranges
+                            if _range_starts_within(merge_, start_row_idx, start_col_idx, end_row_idx, end_col_idx)]
+
+            tables.append(_read_table(sheet, start_row_idx, start_col_idx, end_row_idx, end_col_idx, table_merges,
+                                      max_snapshot_rows, digest_only))
+
+    return tables
+
+
+def _table_names(sheet_name, num_tables):
+    """
+    Name the tables found within a worksheet (which is used as the name of their .tex files).
+
+    :param sheet_name: [string] name of the worksheet
+    :param num_tables: [Int] number of tables found within the worksheet
+    :return: [list] the name of each table: the name of the worksheet if it holds a single table, otherwise the name of
+    the worksheet followed by the number of the table (e.g. "results_1", "results_2", ...)
+    """
+
+    if num_tables == 1:
+        return [sheet_name]
+
+    return [sheet_name + '_' + str(table_num) for table_num in range(1, num_tables + 1)]
+
+
+def _max_snapshot_rows(usr_settings):
+    """
+    Get the number of rows of the largest table to take a snapshot of (see _read_table). The tables that are split into
+    several parts (see _table_parts) are read in a part at a time.
+
+    :param usr_settings: [dict] user defined options
+    :return: [int] the number of rows (None if no tables are split)
+    """
+
+    if usr_settings['chunk_rows']:
+        return usr_settings['header_rows'] + usr_settings['chunk_rows']
+
+    return None
+
+
+def _read_tables(sheet, sheet_name, usr_settings, timer=None):
+    """
+    Read in the table(s) of a worksheet to convert: the defined names and Excel tables on the worksheet if
+    usr_settings['named_ranges'] is True, each of the tables found within the worksheet if usr_settings['multitable'] is
+    True, and otherwise the single table found within the worksheet.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the table(s)
+    :param sheet_name: [string] name of the worksheet
+    :param usr_settings: [dict] user defined options
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :return: (1) [list] names of the tables (used as the names of their .tex files), (2) [list] _SheetTable of each
+    table. Both are empty if the worksheet is empty (or has no defined names or Excel tables), so it is skipped.
+    """
+
+    max_snapshot_rows = _max_snapshot_rows(usr_settings)
+
+    # The tables are looked up in the conversion cache before their cells are read in any further than is needed to work
+    # out their key (the tables not found are read again, see _reread_table)
+    digest_only = usr_settings.get('cache_dir') is not None
+
+    if usr_settings['named_ranges']:
+        return _read_named_tables(sheet, timer, max_snapshot_rows, digest_only)
+
+    if usr_settings['multitable']:
+        tables = _read_sheet_tables(sheet, timer, max_snapshot_rows, digest_only)
+    else:
+        table = _read_sheet_table(sheet, timer, max_snapshot_rows, digest_only)
+        tables = [] if table is None else [table]
+
+    return _table_names(sheet_name, len(tables)), tables
+
+
+class _TableWindow(object):
+    """
+    A snapshot of a run of consecutive rows of a table, and the horizontal rules of those rows.
+
+    The horizontal rules of a row only depend on the rows either side of it (see _get_rule_map), so the rules of the
+    rows of the window are those of the whole table, apart from the top rules of its first row and the bottom rules of
+    its last row (unless these are the first and last rows of the table).
+    """
+
+    __slots__ = ('snapshot', 'first_row', 'top_rules', 'bottom_rules')
+
+    def __init__(self, snapshot, first_row, merge_index):
+        """
+        :param snapshot: [_TableSnapshot] snapshot of the rows of the window
+        :param first_row: [int] row number (relative to the upper-left cell of the table) of the first row of the window
+        :param merge_index: [dict] merged cells of the table indexed by row (see _get_merged_cells)
+        """
+
+        # Index the merged cells in the rows of the window by their row within the window
+        window_merges = {}
+
+        for row_num, row_merges in merge_index.items():
+            if first_row <= row_num < first_row + snapshot.num_rows:
+                window_merges[row_num - first_row] = {start_col: (end_col, end_row - first_row, merge_code)
+                                                      for start_col, (end_col, end_row, merge_code)
+                                                      in row_merges.items()}
+
+        self.snapshot = snapshot
+        self.first_row = first_row
+        self.top_rules, self.bottom_rules = _get_rule_map(snapshot, window_merges)
+
+
+class _TableLatex(object):
+    """
+    The parts of the LaTeX code of a table that need the whole table to work out (the column alignments, the merged
+    cells and the horizontal rules). The code of the table itself is then created row by row (see rows), so it can be
+    written to a file as it is created rather than being held in memory all at once.
+
+    If only a summary of the table was read (see _read_table), the rows of each part of the table are read from the
+    sheet again as the part is created, so only the cells of one part of the table are held at once (see _read_window).
+    """
+
+    __slots__ = ('table', 'merge_index', 'preamble', 'num_head_rows', 'usr_settings', 'timer', 'head_window',
+                 'row_reader', 'row_buffer', 'buffer_start', 'style_cache')
+
+    def __init__(self, table, usr_settings, timer=None):
+        """
+        :param table: [_SheetTable] the table (see _read_sheet_table)
+        :param usr_settings: [dict] user defined options
+        :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+        """
+
+        table_cells = table.snapshot if table.snapshot is not None else table.summary
+
+        # Get the details of the merged cells within this particular worksheet, indexed by row of the table
+        with _time_stage(timer, 'merges'):
+            merge_index = _get_merged_cells(table.sheet, table_cells, table.start_row_idx, table.start_col_idx,
+                                            table.merge_ranges)
+
+        # Preamble of the individual table
+        # --------------------------------
+        tex_parts = []
+
+        # If the user requested the booktabs options, add a reminder (as a LaTeX comment) to the top of the table that
+        # the user will need to load up the package in the preamble of their file.
+        if usr_settings['booktabs']:
+            tex_parts.append('% Note: make sure \\usepackage{booktabs} is included in the preamble \n')
+
+        tex_parts.append('% Note: If your table contains colors, make sure \\usepackage[table]{xcolor} is included in '
+                         'the preamble \n')
+
+        # Merged cells spanning several rows need the multirow package
+        if _has_multirow(merge_index):
+            tex_parts.append('% Note: make sure \\usepackage{multirow} is included in the preamble \n')
+
+        if usr_settings['longtable']:
+            tex_parts.append('% Note: make sure \\usepackage{longtable} is included in the preamble \n')
+
+        # If the user wants the table rows wrapped in the tabular (or longtable) environment, write the start of the
+        # begin environment command to the output tex file
+        if usr_settings['includetabular']:
+
+            # Create code to write to tex output file, with the alignment and any vertical dividers of each column
+            with _time_stage(timer, 'header'):
+                environment = 'longtable' if usr_settings['longtable'] else 'tabular'
+                begin_str = '\\begin{' + environment + '}{' + _create_column_spec(table_cells) + '} \n'
+
+            # Write the \begin{tabular}{*} code to the tex file
+            tex_parts.append(begin_str)
+
+        self.table = table
+        self.merge_index = merge_index
+        self.preamble = ''.join(tex_parts)
+        self.num_head_rows = min(usr_settings['header_rows'], table.num_rows)
+        self.usr_settings = usr_settings
+        self.timer = timer
+
+        # With a snapshot of the whole table, find which cells have a horizontal rule above and below them for the whole
+        # table at once. Otherwise the header rows are read in with the first part of the table (see rows).
+        self.head_window = None
+
+        if table.snapshot is not None:
+            with _time_stage(timer, 'rules'):
+                self.head_window = _TableWindow(table.snapshot, 0, merge_index)
+
+        self.row_reader = None  # generator of the rows of the table (see _read_window)
+        self.row_buffer = []  # rows read from row_reader that are still needed
+        self.buffer_start = 0  # row number of the first row in row_buffer
+        self.style_cache = {}  # see _cell_style
+
+    def _read_window(self, first_row, stop_row):
+        """
+        Read in rows of the table from the sheet again, and take a snapshot of them with their horizontal rules.
+
+        The rows are read in order in a single pass over the sheet, so the rows of each part of the table are read after
+        those of the part before it. The last rows read are kept, as the windows of neighbouring parts overlap.
+
+        :param first_row: [int] row number (relative to the upper-left cell of the table) of the first row to read
+        :param stop_row: [int] row number of the row after the last row to read
+        :return: [_TableWindow] the rows
+        """
+
+        table = self.table
+
+        with _time_stage(self.timer, 'read'):
+
+            # Start a new pass over the sheet for rows that have already been passed
+            if (self.row_reader is None) or (first_row < self.buffer_start):
+                self.row_reader = _iter_table_rows(table.sheet, table.start_row_idx, table.start_col_idx,
+                                                   table.start_row_idx + table.num_rows - 1,
+                                                   table.start_col_idx + table.num_cols - 1, table.merge_ranges)
+                self.row_buffer = []
+                self.buffer_start = 0
+
+            # Drop the rows before the window (skipping any that have not been read yet), then read up to its end
+            num_skipped = first_row - self.buffer_start - len(self.row_buffer)
+            del self.row_buffer[:first_row - self.buffer_start]
+
+            for _ in range(0, num_skipped):
+                next(self.row_reader)
+
+            self.buffer_start = first_row
+
+            while self.buffer_start + len(self.row_buffer) < stop_row:
+                self.row_buffer.append(next(self.row_reader))
+
+            snapshot = _TableSnapshot(self.row_buffer[:stop_row - first_row], self.style_cache)
+
+            # Only the last two rows are shared with the window of the next part
+            del self.row_buffer[:-2]
+            self.buffer_start = stop_row - len(self.row_buffer)
+
+        with _time_stage(self.timer, 'rules'):
+            return _TableWindow(snapshot, first_row, self.merge_index)
+
+    def _windows(self, body_rows):
+        """
+        Get the rows needed to create the header rows, and the given rows below them.
+
+        :param body_rows: [range] row numbers of the rows below the header rows
+        :return: (1) [_TableWindow] holding the header rows, (2) [_TableWindow] holding the rows of body_rows
+        """
+
+        if self.table.snapshot is not None:
+            return self.head_window, self.head_window
+
+        num_rows = self.table.num_rows
+
+        # Each window also holds the row either side of its rows, as they are needed for its horizontal rules
+        if self.head_window is None:
+            self.head_window = self._read_window(0, min(self.num_head_rows + 1, num_rows))
+
+        if len(body_rows) == 0:
+            return self.head_window, self.head_window
+
+        return self.head_window, self._read_window(max(body_rows[0] - 1, 0), min(body_rows[-1] + 2, num_rows))
+
+    def rows(self, body_rows=None):
+        """
+        Create the LaTeX code for the table (or for one part of a table split into several parts, see _table_parts),
+        one row at a time.
+
+        :param body_rows: [range] row numbers of the rows below the header rows to include (if None, all of them). The
+        header rows are always included.
+        :return: generator of the pieces of the LaTeX code for the table
+        """
+
+        usr_settings = self.usr_settings
+
+        if body_rows is None:
+            body_rows = range(self.num_head_rows, self.table.num_rows)
+
+        row_nums = list(range(0, self.num_head_rows)) + list(body_rows)
+        num_rows = len(row_nums)
+
+        head_window, body_window = self._windows(body_rows)
+
+        # The window holding each row, and the position of the row within it
+        row_windows = [(head_window, row_num - head_window.first_row) if row_num < self.num_head_rows else
+                       (body_window, row_num - body_window.first_row) for row_num in row_nums]
+
+        yield self.preamble
+
+        # Body of the individual table
+        # ----------------------------
+
+        # For each row in the table's body create a string containing the tex code for that row and write to the output
+        # file. The time spent creating the rows is added up here, as the rows are written while they are created.
+        rows_time = 0.0
+
+        for row_pos, row_num in enumerate(row_nums):
+            tic = time.perf_counter()
+
+            tex_parts = []
+            window, window_row = row_windows[row_pos]
+
+            # Look up the merged cells in this row
+            row_merges = self.merge_index.get(row_num, {})
+
+            # If there is a horizontal rule at the top of the table, add it to the table
+            if row_pos == 0:
+                hrule_str = _create_horzrule_code(window.top_rules[window_row], usr_settings)
+
+                # If user requested booktabs, use toprule rather than midrule
+                if usr_settings['booktabs']:
+                    hrule_str = hrule_str.replace('\\midrule', '\\toprule')
+
+                tex_parts.append(hrule_str)
+
+            # Get string of rows contents
+            tex_parts.append(_tupple2latexstring(window.snapshot.row_values(window_row), usr_settings, row_merges,
+                                                 window.snapshot.styles[window_row], self.timer))
+
+            # Add any horizontal rule below the row. A bottom border on this row and a top border on the row below look
+            # like a single line in Excel, so they are combined into a single line here.
+            if row_pos < num_rows - 1:
+                next_window, next_window_row = row_windows[row_pos + 1]
+                hrule_str = _create_horzrule_code(_combine_rules(window.bottom_rules[window_row],
+                                                                 next_window.top_rules[next_window_row]), usr_settings)
+            else:
+                hrule_str = _create_horzrule_code(window.bottom_rules[window_row], usr_settings)
+
+                # If user requested booktabs, and this is the final row, use bottomrule rather than midrule
+                if usr_settings['booktabs']:
+                    hrule_str = hrule_str.replace('\\midrule', '\\bottomrule')
+
+            tex_parts.append(hrule_str)
+
+            # In a longtable, the header rows are repeated at the top of each page
+            if usr_settings['longtable'] and (row_pos == self.num_head_rows - 1):
+                tex_parts.append('\\endhead \n')
+
+            rows_time += time.perf_counter() - tic
+
+            yield ''.join(tex_parts)
+
+        if self.timer is not None:
+            self.timer.add('rows', rows_time)
+
+        # Postamble of the individual table
         # ---------------------------------
         if usr_settings['includetabular']:
             # User has requested tabular environment wrapped around the table rows, so end the table
-            file.write("\\end{tabular}")
+            yield '\\end{longtable}' if usr_settings['longtable'] else '\\end{tabular}'
+
+
+def _table_to_latex(table, usr_settings, timer=None):
+    """
+    Create the LaTeX code for a table.
+
+    :param table: [_SheetTable] the table (see _read_sheet_table)
+    :param usr_settings: [dict] user defined options
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :return: [string] the LaTeX code for the table
+    """
+
+    return ''.join(_TableLatex(table, usr_settings, timer).rows())
+
+
+def _table_parts(table_name, table, usr_settings):
+    """
+    Split a table into the parts written to separate .tex files, if usr_settings['chunk_rows'] is set and the table has
+    more rows than this below its header rows. Each part holds the header rows followed by (up to) chunk_rows rows.
+
+    :param table_name: [string] name of the table
+    :param table: [_SheetTable] the table
+    :param usr_settings: [dict] user defined options
+    :return: [list] (1) [string] name of the part (the name of the table, followed by "_part" and the number of the
+    part if the table is split), (2) [string] location of the rows of the part within the excel sheet (the first part
+    includes the header rows), (3) [range] row numbers of the rows below the header rows in the part, for each part
+    """
+
+    num_rows = table.num_rows
+    num_head_rows = min(usr_settings['header_rows'], num_rows)
+    chunk_rows = usr_settings['chunk_rows']
+
+    if (not chunk_rows) or (num_rows - num_head_rows <= chunk_rows):
+        return [(table_name, table.location, range(num_head_rows, num_rows))]
+
+    end_col_idx = table.start_col_idx + table.num_cols - 1
+
+    parts = []
+
+    for part_num, first_row in enumerate(range(num_head_rows, num_rows, chunk_rows), start=1):
+        body_rows = range(first_row, min(first_row + chunk_rows, num_rows))
+
+        location = _cell_label(table.start_row_idx + (0 if part_num == 1 else first_row), table.start_col_idx) + \
+            ':' + _cell_label(table.start_row_idx + body_rows[-1], end_col_idx)
+
+        parts.append((table_name + '_part' + str(part_num), location, body_rows))
+
+    return parts
+
+
+def _write_table_file(filename, tex_parts, timer=None):
+    """
+    Write the LaTeX code of a table to a file as it is created (see _TableLatex.rows), so the code of the whole table is
+    never held in memory.
+
+    :param filename: [string] path and name of the file
+    :param tex_parts: [generator] the pieces of the LaTeX code for the table
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :return: None
+    """
+
+    if timer is None:
+        _write_tex_file(filename, tex_parts)
+        return
+
+    # The rows are created (and may be read from the sheet) while the file is written, and their time is recorded in
+    # "rows" (and "read" and "rules", see _TableLatex.rows), so leave it out of the time spent writing. Classifying the
+    # text of cells happens while creating the rows, so is not counted twice.
+    def other_stages_time():
+        return sum(seconds for stage, seconds in timer.stage_times.items() if stage != 'classify')
+
+    other_before = other_stages_time()
+    tic = time.perf_counter()
+
+    _write_tex_file(filename, tex_parts)
+
+    timer.add('write', time.perf_counter() - tic - (other_stages_time() - other_before))
+
+
+def _cache_store(cache_filename, tex_parts):
+    """
+    Pass on the pieces of the LaTeX code of a table, adding them to the conversion cache as they go by. As with
+    _write_tex_file, the pieces are written to a temporary file that is only renamed to the entry once all of them have
+    been passed on, so the cache never holds a half-written table if the conversion is stopped part way.
+
+    :param cache_filename: [string] path and name of the file of the entry (see _cache_filename)
+    :param tex_parts: [iterable] the pieces of the LaTeX code of the table (or of one part of it)
+    :return: generator of the pieces of the LaTeX code
+    """
+
+    folder, name = os.path.split(cache_filename)
+    temp_filename = os.path.join(folder, '.' + name + '.' + uuid.uuid4().hex + '.tmp')
+
+    try:
+        with open(temp_filename, 'x') as file:
+            for piece in tex_parts:
+                file.write(piece)
+                yield piece
+
+        os.replace(temp_filename, cache_filename)
+
+    finally:
+        # Do not leave the temporary file lying around if the pieces were not all used (or something went wrong)
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
 
-        file.close()  # Close off the current .tex file (completing the creation of the table code)
 
-    # Make PDF of the tables for checking purposes
-    if makepdf & includetabular:  # can only compile the tables if the tabular environment is included
-        create_pdf_of_tables(workbook, output_dir)
+def _table_part_tex(table, parts, usr_settings, timer=None):
+    """
+    Create the LaTeX code of each part of a table (see _table_parts). If usr_settings['cache_dir'] is set, parts that
+    have been converted before (on any run, from any workbook) are copied from the conversion cache, and the others are
+    added to the cache as they are created.
+
+    The code of each part is given as the pieces it is made of, so the code of a whole table never needs to be held in
+    memory. The pieces of a part must be used up before moving on to the next part: the rows of the table are read from
+    the sheet as they are needed, and a part is only added to the cache once all of its pieces have been used.
+
+    :param table: [_SheetTable] the table
+    :param parts: [list] the parts of the table (see _table_parts)
+    :param usr_settings: [dict] user defined options
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :return: generator of (1) [string] name of the part, (2) [iterable] the pieces of the LaTeX code of the part, (3)
+    [True/False] was the part copied from the conversion cache?
+    """
+
+    cache_dir = usr_settings.get('cache_dir')
+    latex = None  # Only worked out if the table (or a part of it) is not in the conversion cache
+
+    table_key = None
+    if cache_dir is not None:
+        with _time_stage(timer, 'cache'):
+            table_key = _cache_key(table, usr_settings)
+
+    for part_name, _location, body_rows in parts:
+        cache_filename = None
+
+        # If the same table has been converted before, copy its TeX code from the cache
+        if table_key is not None:
+            with _time_stage(timer, 'cache'):
+                cache_filename = _cache_filename(cache_dir, table_key, body_rows)
+                cache_file = _cache_lookup(cache_filename)
+
+            if cache_file is not None:
+                with cache_file:
+                    yield part_name, iter(lambda: cache_file.read(1024 * 1024), ''), True
+                continue
+
+        if latex is None:
+            with _time_stage(timer, 'read'):
+                table = _reread_table(table, _max_snapshot_rows(usr_settings))
+
+            latex = _TableLatex(table, usr_settings, timer)
+
+        tex_parts = latex.rows(body_rows)
+
+        # Add the TeX code to the cache as it is created, for the next time the same table is converted
+        if cache_filename is not None:
+            tex_parts = _cache_store(cache_filename, tex_parts)
+
+        yield part_name, tex_parts, False
+
+
+def _convert_sheet(sheet, sheet_name, output_dir, usr_settings, previous_hashes=None, timer=None):
+    """
+    Create the .tex file for the table found within a single worksheet (or a .tex file for each of the tables found
+    within the worksheet, or for each of its defined names and Excel tables, see _read_tables).
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the table
+    :param sheet_name: [string] name of the worksheet, which is used as the name of the .tex file (see _table_names)
+    :param output_dir: [string] path of the directory to output the TeX file to
+    :param usr_settings: [dict] user defined options
+    :param previous_hashes: [dict] hash of each table from the last run, keyed by worksheet name. If given, the table's
+    hash is calculated, and the TeX file is left untouched if the table has not changed since the last run.
+    :param timer: [_StageTimer] records the time spent in each stage of the conversion (optional)
+    :return: (1) [list] (name, location within the excel sheet (e.g. "A1:D6")) of each table, (2) [string] hash of the
+    table(s) (None if previous_hashes is not given), (3) [True/False] were the TeX files left untouched as the tables
+    are unchanged?, (4) [tuple] number of TeX files copied from the conversion cache (hits) and created (misses), if
+    usr_settings['cache_dir'] is set
+    """
+
+    table_names, tables = _read_tables(sheet, sheet_name, usr_settings, timer)
+
+    # Tables with a lot of rows may be split into several parts, each written to its own file
+    table_parts = [_table_parts(table_name, table, usr_settings) for table_name, table in zip(table_names, tables)]
+    table_locations = [(part_name, location) for parts in table_parts for part_name, location, _body_rows in parts]
+
+    # If the table has not changed since the last run, there is no need to re-create its .tex file
+    table_hash = None
+
+    if previous_hashes is not None:
+        with _time_stage(timer, 'hash'):
+            table_hashes = [_hash_table(_table_digest(table), table.location, table.merge_ranges, usr_settings)
+                            for table in tables]
+
+        # Combine the hashes of the tables of a worksheet holding more than one table
+        if len(table_hashes) == 1:
+            table_hash = table_hashes[0]
+        else:
+            table_hash = hashlib.sha256(' '.join(table_hashes).encode('utf-8')).hexdigest()
+
+        if (previous_hashes.get(sheet_name) == table_hash) and \
+                all(os.path.isfile(output_dir + part_name + '.tex') for part_name, _location in table_locations):
+            return table_locations, table_hash, True, (0, 0)
+
+    cache_dir = usr_settings.get('cache_dir')
+    cache_hits = 0
+    cache_misses = 0
+
+    for table, parts in zip(tables, table_parts):
+        for part_name, tex_parts, from_cache in _table_part_tex(table, parts, usr_settings, timer):
+            filename = output_dir + part_name + '.tex'
+
+            if from_cache:
+                with _time_stage(timer, 'cache'):
+                    _write_tex_file(filename, tex_parts)
+
+                cache_hits += 1
+                continue
+
+            if cache_dir is not None:
+                cache_misses += 1
+
+            # Write the .tex file as the rows of the table are created (completing the creation of the table code)
+            _write_table_file(filename, tex_parts, timer)
+
+    # Return the location of the tables within the sheet, so they can be reported to the user
+    return table_locations, table_hash, False, (cache_hits, cache_misses)
+
+
+# Workbook opened by each worker process when the worksheets are converted in parallel (see _init_worker)
+_worker_workbook = None
+
+
+def _init_worker(input_excel_filename, streaming):
+    """
+    Set up a worker process of the process pool by opening its own copy of the workbook. This is done once per worker
+    process, rather than once per worksheet.
+
+    :param input_excel_filename: [string] path and file name of the excel file containing the tables
+    :param streaming: [True/False] Should the workbook be opened in read-only mode?
+    :return: None
+    """
+
+    global _worker_workbook
+    _worker_workbook = openpyxl.load_workbook(filename=input_excel_filename, read_only=streaming, data_only=True)
+
+
+def _convert_sheet_measured(sheet, sheet_name, output_dir, usr_settings, previous_hashes, measure):
+    """
+    Create the .tex file for a single worksheet, measuring the time spent in each stage and the peak memory use of the
+    process.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the table
+    :param sheet_name: [string] name of the worksheet
+    :param output_dir: [string] path of the directory to output the TeX file to
+    :param usr_settings: [dict] user defined options
+    :param previous_hashes: [dict] hash of each table from the last run (see _convert_sheet)
+    :param measure: [True/False] Should the time spent in each stage and the peak memory use be measured?
+    :return: (1) see _convert_sheet, (2) [dict] seconds spent in each stage, (3) [float] peak memory use of the process
+    so far in MB ((2) and (3) are None if measure is False)
+    """
+
+    if not measure:
+        return _convert_sheet(sheet, sheet_name, output_dir, usr_settings, previous_hashes), None, None
+
+    timer = _StageTimer()
+
+    result = _convert_sheet(sheet, sheet_name, output_dir, usr_settings, previous_hashes, timer)
+
+    return result, timer.stage_times, _peak_memory_mb()
+
+
+def _convert_sheet_in_worker(sheet_name, output_dir, usr_settings, previous_hashes, measure):
+    """
+    Create the .tex file for a single worksheet from within a worker process of the process pool.
+
+    :param sheet_name: [string] name of the worksheet to convert
+    :param output_dir: [string] path of the directory to output the TeX file to
+    :param usr_settings: [dict] user defined options
+    :param previous_hashes: [dict] hash of each table from the last run (see _convert_sheet)
+    :param measure: [True/False] Should the time spent in each stage and the peak memory use be measured?
+    :return: see _convert_sheet_measured
+    """
+
+    return _convert_sheet_measured(_worker_workbook[sheet_name], sheet_name, output_dir, usr_settings,
+                                   previous_hashes, measure)
+
+
+def convert_sheet(sheet, booktabs=True, includetabular=True, roundtodp=True, numdp=3, longtable=False, header_rows=1):
+    """
+    Create the LaTeX code for the table found within a single worksheet, without writing anything to disk.
+
+    :param sheet: openpyxl excel worksheet object (regular or read-only) containing the table
+    :param booktabs: [True/False] Should booktabs be used rather than regular horizontal rules?
+    :param includetabular: [True/False] Should the table be wrapped in a tabular environment?
+    :param roundtodp: [True/False] Should numbers be rounded to a specific number of decimal places?
+    :param numdp: [Int] How many decimal places to use (only applies is roundtodp=True)
+    :param longtable: [True/False] Should the table be a longtable, which can break across pages?
+    :param header_rows: [Int] number of rows at the top of the table repeated on each page of a longtable
+    :return: [string] the LaTeX code for the table (the same as the contents of the .tex file excel2latexviapython
+    would create for the worksheet), or an empty string if the worksheet is empty
+    """
+
+    usr_settings = {'booktabs': booktabs, 'includetabular': includetabular, 'roundtodp': roundtodp, 'numdp': numdp,
+                    'longtable': longtable, 'header_rows': header_rows}
+
+    table = _read_sheet_table(sheet)
+
+    # An empty worksheet has no table (and excel2latexviapython would skip it)
+    if table is None:
+        return ''
+
+    return _table_to_latex(table, usr_settings)
+
+
+def convert_workbook(workbook, booktabs=True, includetabular=True, roundtodp=True, numdp=3, streaming=False,
+                     sheets=None, exclude_sheets=None, multitable=False, named_ranges=False, longtable=False,
+                     header_rows=1, chunk_rows=None, cache_dir=None, cache_size_mb=_CACHE_SIZE_MB):
+    """
+    Create the LaTeX code for the tables found within each worksheet of an excel workbook, without writing anything to
+    disk. The worksheets are converted one at a time as the results are iterated over, so a large workbook never needs
+    all of its tables to be held in memory at once.
+
+    :param workbook: the excel workbook. Either [string] the path and file name of the excel file, [bytes] the contents
+    of the excel file, a binary file-like object to read the excel file from, or an openpyxl workbook object
+    :param booktabs: [True/False] Should booktabs be used rather than regular horizontal rules?
+    :param includetabular: [True/False] Should each table be wrapped in a tabular environment?
+    :param roundtodp: [True/False] Should numbers be rounded to a specific number of decimal places?
+    :param numdp: [Int] How many decimal places to use (only applies is roundtodp=True)
+    :param streaming: [True/False] Should the workbook be opened in read-only mode? (Only applies if the workbook is
+    not already an openpyxl workbook object.)
+    :param sheets: [string/list] names or glob patterns of the worksheets to convert. If None, all worksheets are
+    converted
+    :param exclude_sheets: [string/list] names or glob patterns of worksheets not to convert
+    :param multitable: [True/False] Look for more than one table within each worksheet (see excel2latexviapython)?
+    :param named_ranges: [True/False] Convert the defined names and Excel tables of each worksheet, rather than the
+    worksheet itself (see excel2latexviapython)?
+    :param longtable: [True/False] Should each table be a longtable, which can break across pages?
+    :param header_rows: [Int] number of rows at the top of each table repeated on each page of a longtable, and at the
+    top of each part of a table split by chunk_rows
+    :param chunk_rows: [Int] if given, split tables with more than this many rows below their header rows into parts
+    (see excel2latexviapython)
+    :param cache_dir: [string] if given, path of the directory of the conversion cache (see excel2latexviapython)
+    :param cache_size_mb: [float] size limit of the conversion cache in MB
+    :return: generator of (1) [string] name of the table (the name of the worksheet, followed by the number of the
+    table if multitable finds more than one table within the worksheet, or the defined name or name of the Excel table
+    with named_ranges, followed by the number of the part if split by chunk_rows), (2) [string] the LaTeX code for the
+    table
+    """
+
+    usr_settings = {'booktabs': booktabs, 'includetabular': includetabular, 'roundtodp': roundtodp, 'numdp': numdp,
+                    'multitable': multitable, 'named_ranges': named_ranges, 'longtable': longtable,
+                    'header_rows': header_rows, 'chunk_rows': chunk_rows, 'cache_dir': cache_dir}
+
+    # Open the workbook, unless we have been given an already open workbook. Only close the workbook at the end if we
+    # opened it here.
+    opened_here = not isinstance(workbook, openpyxl.Workbook)
+
+    if opened_here:
+        if isinstance(workbook, (bytes, bytearray)):
+            workbook = io.BytesIO(workbook)
+
+        workbook = openpyxl.load_workbook(filename=workbook, read_only=streaming, data_only=True)
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    try:
+        for sheet_name in _select_sheets(workbook.get_sheet_names(), sheets, exclude_sheets):
+            for table_name, table in zip(*_read_tables(workbook[sheet_name], sheet_name, usr_settings)):
+                parts = _table_parts(table_name, table, usr_settings)
+
+                for part_name, tex_parts, _from_cache in _table_part_tex(table, parts, usr_settings):
+                    yield part_name, ''.join(tex_parts)
+    finally:
+        # Trim the cache even if the results were not all used
+        if cache_dir is not None:
+            _trim_cache(cache_dir, cache_size_mb)
+
+        if opened_here:
+            workbook.close()
+
+
+def excel2latexviapython(input_excel_filename, output_dir, booktabs=True, includetabular=True, roundtodp=True, numdp=3,
+                         makepdf=False, streaming=False, workers=1, incremental=False, timing=False, sheets=None,
+                         exclude_sheets=None, preview=False, progress=None, cancel=None, hook=None, report_file=None,
+                         multitable=False, named_ranges=False, longtable=False, header_rows=1, chunk_rows=None,
+                         cache_dir=None, cache_size_mb=_CACHE_SIZE_MB, pdf_timeout=120):
+    """
+    This function takes an excel workbook of tables, and creates individual TeX files for the tables found within each
+    worksheet of the workbook.
+
+    :param input_excel_filename: [string] path and file name of the excel file containing the tables
+    :param output_dir: [string] path of the directory to output the TeX files to
+    :param booktabs: [True/False] Should booktabs be used rather than regular horizontal rules?
+    :param includetabular: [True/False] Should each table be wrapped in a tabular environment?
+    :param roundtodp: [True/False] Should numbers be rounded to a specific number of decimal places?
+    :param numdp: [Int] How many decimal places to use (only applies is roundtodp=True)
+    :param makepdf: [True/False] Should the code also create a simple PDF document of all the tables?
+    :param streaming: [True/False] Should the workbook be opened in read-only mode? This reads each worksheet from the
+    file as it is converted, rather than loading the whole workbook into memory up front. Useful for very large
+    workbooks.
+    :param workers: [Int] Number of worker processes to convert the worksheets with. If more than 1, the worksheets are
+    converted in parallel, with each worker process opening its own copy of the workbook.
+    :param incremental: [True/False] Only re-create the TeX files of tables that have changed since the last run? A
+    manifest of the tables is stored in the output directory, and TeX files of unchanged tables are left untouched.
+    :param timing: [True/False] Print how much time was spent in each stage of the conversion?
+    :param sheets: [string/list] names or glob patterns (e.g. "table_*") of the worksheets to convert. If None, all
+    worksheets are converted. In streaming mode, only the selected worksheets are read from the file.
+    :param exclude_sheets: [string/list] names or glob patterns of worksheets not to convert
+    :param multitable: [True/False] Look for more than one table within each worksheet? Tables must be separated from
+    each other by at least one empty row or column (without borders). If a worksheet holds more than one table, each
+    table is written to its own TeX file, named after the worksheet and the number of the table (e.g. "results_1.tex",
+    "results_2.tex"), numbered from top to bottom and then left to right.
+    :param named_ranges: [True/False] Convert the defined names (Formulas > Define Name) and Excel tables (Insert >
+    Table) of each worksheet, rather than the worksheet itself? Each is written to its own TeX file, named after the
+    defined name or Excel table. Only the cells of these ranges are read, so large worksheets of workings can hold a few
+    small tables without slowing down the conversion. Worksheets without defined names or Excel tables are skipped.
+    :param longtable: [True/False] Should each table be a longtable (from the longtable LaTeX package), which can break
+    across pages, rather than a tabular? The header rows of the table are repeated at the top of each page.
+    :param header_rows: [Int] number of rows at the top of each table that form its header. The header is repeated on
+    each page of a longtable, and at the top of each part of a table split by chunk_rows.
+    :param chunk_rows: [Int] if given, tables with more than this many rows below their header rows are split into
+    parts of (up to) this many rows, each written to its own TeX file (e.g. "results_part1.tex", "results_part2.tex")
+    with the header rows repeated at the top. The cells of a table that is split are read one part at a time as the
+    parts are written (after a first pass over the table to work out its column alignments and merged cells), so the
+    cells of a very tall table are never all held in memory at once.
+    :param cache_dir: [string] if given, path of a directory to keep a cache of the TeX code of converted tables in. The
+    cache is keyed by the contents and formatting of each table and the user settings (but not by where the table is),
+    so it can be shared between workbooks and runs: a table that has been converted before, in any workbook, is copied
+    from the cache rather than converted again. The number of tables found in (hits) and added to (misses) the cache is
+    reported at the end of the run.
+    :param cache_size_mb: [float] size limit of the conversion cache in MB. At the end of each run, the least recently
+    used tables are removed from the cache until it is within the limit.
+    :param preview: [True/False] When making the PDF, compile each table as its own document in parallel (skipping
+    tables that are unchanged since they were last compiled) and merge them into one PDF? (Only applies if
+    makepdf=True)
+    :param pdf_timeout: [float] seconds to wait for each run of pdflatex when making the PDF before giving up (only
+    applies if makepdf=True)
+    :param progress: [function] called after each worksheet is converted, as progress(sheet_name, num_done, num_sheets,
+    num_cells), where num_done is the number of worksheets converted so far (including this one), num_sheets the number
+    of worksheets to convert, and num_cells the number of cells in the worksheet's table. Useful for reporting progress
+    (e.g. in the GUI).
+    :param cancel: [threading.Event] if given, the conversion stops before the next worksheet once the event is set.
+    The PDF and the manifest are then not created.
+    :param hook: [function] if given, called as hook(event, data) to report where the time goes. After each worksheet
+    is converted, it is called with event "sheet" and data a dictionary of the worksheet's name, table location, number
+    of cells, the seconds spent in each stage of converting it, and the peak memory use in MB of the process that
+    converted it so far ("process_peak_memory_mb", a high-water mark rather than the memory used by that worksheet
+    alone). At the end of the run, it is called with event "run" and data the full report (as written to report_file).
+    :param report_file: [string] if given, path and file name of a JSON file to write the report of the run to: the
+    time spent in each stage (load, dimensions, header, merges, rows, rules, write, pdf, ...), the record of each
+    worksheet, and the peak memory use.
+    :return: None
+    """
+
+    # Store the user settings in a dictionary to use
+    usr_settings = {'booktabs': booktabs, 'includetabular': includetabular, 'roundtodp': roundtodp, 'numdp': numdp,
+                    'makepdf': makepdf, 'multitable': multitable, 'named_ranges': named_ranges, 'longtable': longtable,
+                    'header_rows': header_rows, 'chunk_rows': chunk_rows, 'cache_dir': cache_dir}
+
+    # PREAMBLE
+    # ==================================================================================================================
+
+    # Print output so user can follow progress.
+    print('EXCEL 2 LATEX VIA PYTHON')
+    print('Creates .TeX table files from excel file.')
+    print('\nSource file:      ' + input_excel_filename)
+
+    print('Output directory: ' + output_dir + '\n')
+    print('User settings:')
+    print('    booktabs: ' + str(usr_settings['booktabs']))
+    print('    includetabular: ' + str(usr_settings['includetabular']))
+    print('    roundtodp: ' + str(usr_settings['roundtodp']))
+    print('    numdp: ' + str(usr_settings['numdp']))
+    print('    streaming: ' + str(streaming))
+    print('    workers: ' + str(workers))
+    print('    incremental: ' + str(incremental))
+    print('    timing: ' + str(timing))
+    print('    sheets: ' + str(sheets))
+    print('    exclude_sheets: ' + str(exclude_sheets))
+    print('    preview: ' + str(preview))
+    print('    multitable: ' + str(multitable))
+    print('    named_ranges: ' + str(named_ranges))
+    print('    longtable: ' + str(longtable))
+    print('    header_rows: ' + str(header_rows))
+    print('    chunk_rows: ' + str(chunk_rows))
+    print('    cache_dir: ' + str(cache_dir))
+    print('    cache_size_mb: ' + str(cache_size_mb))
+    print('    pdf_timeout: ' + str(pdf_timeout))
+    print('\n')
+
+    # If only re-creating the tables that have changed, read the hashes of the tables from the last run.
+    previous_hashes = None
+    workbook_hash = None
+
+    if incremental:
+        manifest = _read_manifest(output_dir)
+        previous_hashes = manifest.get('sheets', {})
+        workbook_hash = _hash_file(input_excel_filename)
+
+        # If the excel file, the settings and the selected worksheets are exactly the same as the last run, every table
+        # is already up to date, so there is no need to even open the workbook. (If the excel file is unchanged, so are
+        # the names of its worksheets, so the selection can be worked out from the names stored in the manifest.)
+        same_selection = (manifest.get('workbook') == workbook_hash) and ('workbook_sheets' in manifest) and \
+            (_select_sheets(manifest['workbook_sheets'], sheets, exclude_sheets) == manifest.get('selected_sheets'))
+
+        outputs_exist = same_selection and \
+            all(os.path.isfile(output_dir + table_name + '.tex') for sheet_name in manifest['selected_sheets']
+                for table_name in manifest.get('tables', {}).get(sheet_name, [sheet_name]))
+        if makepdf & includetabular:
+            outputs_exist = outputs_exist and os.path.isfile(output_dir + '/output_all_tables.pdf')
+
+        if same_selection and outputs_exist and \
+                (manifest.get('settings') == {key: usr_settings[key] for key in _TEX_SETTINGS}):
+            print('The excel file and user settings are unchanged since the last run, so all tables are up to date')
+            print('\nCode has completed running')
+            return
+
+    print('Starting to create TeX tables (output name, table location within excel sheet')
+
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Load in the Excel workbook/file. In streaming mode the worksheets are only read from the file when we loop over
+    # them below. If the worksheets are converted in parallel, the worker processes open their own copy of the
+    # workbook, so here we only need the names of the worksheets and open the workbook in read-only mode.
+    # Measure where the time goes if it is to be reported in any way
+    measure = timing or (hook is not None) or (report_file is not None)
+    timer = _StageTimer() if measure else None
+    run_tic = time.perf_counter()
+
+    with _time_stage(timer, 'load'):
+        workbook = openpyxl.load_workbook(filename=input_excel_filename, read_only=streaming or (workers > 1),
+                                          data_only=True)
+
+    # MAIN CODE
+    # ==================================================================================================================
+
+    # Only convert the selected worksheets. In streaming mode, the other worksheets are never read from the file.
+    workbook_sheets = workbook.get_sheet_names()
+    sheet_names = _select_sheets(workbook_sheets, sheets, exclude_sheets)
+
+    if not sheet_names:
+        print('    No worksheets match the selected sheets')
+
+    if workers > 1:
+        # Convert the worksheets in parallel. Each worker process opens the workbook itself, and is sent the names of
+        # the worksheets to convert. Results are collected in the order of the worksheets, so the progress printed to
+        # the terminal is the same as when the worksheets are converted one at a time.
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(input_excel_filename, streaming))
+
+        sheet_results = executor.map(_convert_sheet_in_worker, sheet_names, repeat(output_dir), repeat(usr_settings),
+                                     repeat(previous_hashes), repeat(measure))
+    else:
+        executor = None
+
+        # Convert each worksheet/tab within the input workbook in turn. Stop before converting the next worksheet if
+        # the run has been cancelled.
+        sheet_results = (_convert_sheet_measured(workbook[sheet_name], sheet_name, output_dir, usr_settings,
+                                                 previous_hashes, measure)
+                         for sheet_name in sheet_names if not _is_cancelled(cancel))
+
+    # Hash of each table, to store in the manifest. Keep the hashes from the last run of any worksheets that are not
+    # converted on this run, as their TeX files are left as they were.
+    # Also keep the names of the tables of each worksheet (which differ from the name of the worksheet if it holds
+    # more than one table).
+    table_hashes = {}
+    table_names = {}
+    tables_changed = False  # Have any of the TeX files been re-created on this run?
+    cache_hits = 0  # Number of TeX files copied from the conversion cache
+    cache_misses = 0  # Number of TeX files created and added to the conversion cache
+    if previous_hashes is not None:
+        table_hashes = {sheet_name: table_hash for sheet_name, table_hash in previous_hashes.items()
+                        if sheet_name in workbook_sheets}
+        table_names = {sheet_name: names for sheet_name, names in manifest.get('tables', {}).items()
+                       if sheet_name in workbook_sheets}
+
+    num_done = 0
+
+    try:
+        for sheet_name, (sheet_result, stage_times, peak_memory) in zip(sheet_names, sheet_results):
+
+            table_locations, table_hash, unchanged, (sheet_cache_hits, sheet_cache_misses) = sheet_result
+            table_location = ', '.join(location for _table_name, location in table_locations)
+
+            num_done += 1
+            table_hashes[sheet_name] = table_hash
+            table_names[sheet_name] = [table_name for table_name, _location in table_locations]
+            tables_changed = tables_changed or not unchanged
+            cache_hits += sheet_cache_hits
+            cache_misses += sheet_cache_misses
+
+            if timer is not None:
+                sheet_record = timer.add_sheet(sheet_name, table_location, unchanged, stage_times, peak_memory)
+
+                if hook is not None:
+                    hook('sheet', sheet_record)
+
+            # Print to the terminal the name of the table file that has been created and the excel cells used to
+            # create it
+            for table_name, location in table_locations:
+                if unchanged:
+                    print('    ' + table_name + '.tex    ' + location + '    (unchanged)')
+                else:
+                    print('    ' + table_name + '.tex    ' + location)
+
+            if not table_locations:
+                if named_ranges:
+                    print('    ' + sheet_name + '    (no defined names or Excel tables)')
+                else:
+                    print('    ' + sheet_name + '    (empty worksheet, skipped)')
+
+            if progress is not None:
+                progress(sheet_name, num_done, len(sheet_names), _location_num_cells(table_location))
+
+            if _is_cancelled(cancel):
+                break
+
+    finally:
+        if executor is not None:
+            # If the run has been cancelled, don't start converting any more worksheets
+            executor.shutdown(cancel_futures=_is_cancelled(cancel))
+
+    if _is_cancelled(cancel) and (num_done < len(sheet_names)):
+        workbook.close()
+        print('\nCancelled after ' + str(num_done) + ' of ' + str(len(sheet_names)) + ' worksheets')
+        return
+
+    # Make PDF of the tables for checking purposes. If no table has changed since the last run, the existing PDF is
+    # already up to date.
+    pdf_up_to_date = incremental and (not tables_changed) and os.path.isfile(output_dir + '/output_all_tables.pdf')
+
+    # (Can only compile the tables if the tabular environment is included)
+    if makepdf & includetabular & (not pdf_up_to_date):
+        with _time_stage(timer, 'pdf'):
+            create_pdf_of_tables(workbook, output_dir, [table_name for sheet_name in sheet_names
+                                                        for table_name in table_names[sheet_name]], preview=preview,
+                                 timeout=pdf_timeout)
+
+    # Close the excel file (only needed in read-only mode, where the file is kept open while reading the worksheets)
+    workbook.close()
+
+    # Record the hashes of the tables, so that the next run can skip any tables that have not changed
+    if incremental:
+        _write_manifest(output_dir, workbook_hash, usr_settings, table_hashes, workbook_sheets, sheet_names,
+                        table_names)
+
+    # Keep the conversion cache within its size limit, removing the tables that have gone unused the longest
+    if cache_dir is not None:
+        with _time_stage(timer, 'cache'):
+            cache_removed = _trim_cache(cache_dir, cache_size_mb)
+
+        print('\nConversion cache: ' + str(cache_hits) + ' hits, ' + str(cache_misses) + ' misses (' +
+              str(cache_removed) + ' old tables removed)')
+
+    if timer is not None:
+        run_report = timer.to_dict()
+        run_report.update({'input_excel_filename': input_excel_filename,
+                           'output_dir': output_dir,
+                           'settings': {key: usr_settings[key] for key in _TEX_SETTINGS},
+                           'seconds': time.perf_counter() - run_tic})
+
+        if cache_dir is not None:
+            run_report['cache'] = {'hits': cache_hits, 'misses': cache_misses, 'removed': cache_removed}
+
+        if report_file is not None:
+            _write_tex_file(report_file, json.dumps(run_report, indent=4))
+
+        if hook is not None:
+            hook('run', run_report)
+
+        if timing:
+            timer.report()
 
     print('\nCode has completed running')
+
+
+def _is_cancelled(cancel):
+    """
+    Check whether a run has been cancelled.
+
+    :param cancel: [threading.Event] set when the run is cancelled (or None if the run cannot be cancelled)
+    :return: [True/False] has the run been cancelled?
+    """
+
+    return (cancel is not None) and cancel.is_set()
+
+
+def _location_num_cells(table_location):
+    """
+    Count the number of cells in a table from its location within the excel sheet.
+
+    :param table_location: [string] location of the table within the excel sheet (e.g. "A1:D6"), or the locations of
+    several tables separated by commas (e.g. "A1:D6, A9:C12")
+    :return: [Int] number of cells in the table(s)
+    """
+
+    num_cells = 0
+
+    if not table_location:  # A worksheet without any tables to convert
+        return num_cells
+
+    for location in table_location.split(','):
+        min_col, min_row, max_col, max_row = openpyxl.utils.range_boundaries(location.strip())
+        num_cells += (max_col - min_col + 1) * (max_row - min_row + 1)
+
+    return num_cells
+
+
+def _file_signature(filename):
+    """
+    Get the modification time and size of a file, which change whenever the file is saved.
+
+    :param filename: [string] path and file name of the file
+    :return: (1) [int] modification time in nanoseconds, (2) [int] size in bytes. None if the file does not exist (e.g.
+    while it is being replaced by a save)
+    """
+
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def watch_excel2latexviapython(input_excel_filename, output_dir, booktabs=True, includetabular=True, roundtodp=True,
+                               numdp=3, makepdf=False, streaming=False, sheets=None, exclude_sheets=None, preview=False,
+                               poll_interval=0.2, debounce=0.3, max_runs=None, multitable=False, named_ranges=False,
+                               longtable=False, header_rows=1, chunk_rows=None, cache_dir=None,
+                               cache_size_mb=_CACHE_SIZE_MB, pdf_timeout=120):
+    """
+    Keep watching an excel workbook, and re-create the TeX files of the tables that have changed each time the workbook
+    is saved. Runs until interrupted with Ctrl+C (or until max_runs conversions have been done).
+
+    The workbook is watched by polling its modification time and size, so no external packages or services are needed.
+    A save is only acted on once the file has stopped changing for debounce seconds, as Excel writes the file in several
+    steps. The conversion is incremental, so only the tables that have changed are re-created.
+
+    :param input_excel_filename: [string] path and file name of the excel file containing the tables
+    :param output_dir: [string] path of the directory to output the TeX files to
+    :param booktabs: [True/False] Should booktabs be used rather than regular horizontal rules?
+    :param includetabular: [True/False] Should each table be wrapped in a tabular environment?
+    :param roundtodp: [True/False] Should numbers be rounded to a specific number of decimal places?
+    :param numdp: [Int] How many decimal places to use (only applies is roundtodp=True)
+    :param makepdf: [True/False] Should the PDF document of all the tables be re-created after each change?
+    :param streaming: [True/False] Should the workbook be opened in read-only mode?
+    :param sheets: [string/list] names or glob patterns of the worksheets to convert (see excel2latexviapython)
+    :param exclude_sheets: [string/list] names or glob patterns of worksheets not to convert
+    :param preview: [True/False] Should the PDF be made in preview mode (see excel2latexviapython)?
+    :param poll_interval: [float] seconds between each check of the workbook for changes
+    :param debounce: [float] seconds the workbook must stay unchanged after a save before it is converted
+    :param max_runs: [Int] stop after this many conversions (including the first). If None, keep watching forever
+    :param multitable: [True/False] Look for more than one table within each worksheet (see excel2latexviapython)?
+    :param named_ranges: [True/False] Convert the defined names and Excel tables of each worksheet, rather than the
+    worksheet itself (see excel2latexviapython)?
+    :param longtable: [True/False] Should each table be a longtable (see excel2latexviapython)?
+    :param header_rows: [Int] number of header rows of each table (see excel2latexviapython)
+    :param chunk_rows: [Int] if given, split tables into parts of this many rows (see excel2latexviapython)
+    :param cache_dir: [string] if given, path of the directory of the conversion cache (see excel2latexviapython)
+    :param cache_size_mb: [float] size limit of the conversion cache in MB
+    :param pdf_timeout: [float] seconds to wait for each run of pdflatex before giving up (see excel2latexviapython)
+    :return: None
+    """
+
+    def convert():
+        excel2latexviapython(input_excel_filename, output_dir, booktabs=booktabs, includetabular=includetabular,
+                             roundtodp=roundtodp, numdp=numdp, makepdf=makepdf, streaming=streaming, incremental=True,
+                             sheets=sheets, exclude_sheets=exclude_sheets, preview=preview, multitable=multitable,
+                             named_ranges=named_ranges, longtable=longtable, header_rows=header_rows,
+                             chunk_rows=chunk_rows, cache_dir=cache_dir, cache_size_mb=cache_size_mb,
+                             pdf_timeout=pdf_timeout)
+
+    num_runs = 0
+    last_signature = None  # Signature of the workbook when it was last converted
+
+    try:
+        while (max_runs is None) or (num_runs < max_runs):
+
+            signature = _file_signature(input_excel_filename)
+
+            if (signature is None) or (signature == last_signature):
+                time.sleep(poll_interval)
+                continue
+
+            # The workbook has changed. Wait until it has stopped changing before converting it, so a half-written file
+            # is never read.
+            settle_time = time.monotonic() + debounce
+            while time.monotonic() < settle_time:
+                time.sleep(min(poll_interval, debounce))
+                new_signature = _file_signature(input_excel_filename)
+                if new_signature != signature:
+                    signature = new_signature
+                    settle_time = time.monotonic() + debounce
+
+            if signature is None:
+                continue
+
+            tic = time.perf_counter()
+
+            # Keep watching if the conversion fails (e.g. the file was still being written). It will be retried at the
+            # next save.
+            try:
+                convert()
+            except Exception as error:
+                print('\nCould not convert the workbook: ' + repr(error))
+
+            last_signature = signature
+            num_runs += 1
+
+            print('\nConverted in %.2f seconds. Watching ' % (time.perf_counter() - tic) + input_excel_filename +
+                  ' for changes (press Ctrl+C to stop)\n')
+
+    except KeyboardInterrupt:
+        print('\nStopped watching ' + input_excel_filename)
+
+
+def _convert_workbook_file(input_excel_filename, output_dir, settings, report=False):
+    """
+    Convert a single workbook for the command line interface, capturing everything printed while converting it.
+
+    :param input_excel_filename: [string] path and file name of the excel file containing the tables
+    :param output_dir: [string] path of the directory to output the TeX files to
+    :param settings: [dict] keyword arguments to pass to excel2latexviapython
+    :param report: [True/False] Should the report of the time spent in each stage be written to the output directory?
+    :return: (1) [float] seconds taken to convert the workbook, (2) [string] the text printed while converting the
+    workbook, (3) [string] the traceback if the conversion failed (None if it succeeded)
+    """
+
+    log = io.StringIO()
+    error = None
+
+    tic = time.perf_counter()
+
+    with redirect_stdout(log):
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            report_file = os.path.join(output_dir, _REPORT_FILENAME) if report else None
+            excel2latexviapython(input_excel_filename, output_dir, report_file=report_file, **settings)
+        except Exception:
+            error = traceback.format_exc()
+
+    return time.perf_counter() - tic, log.getvalue(), error
+
+
+def _expand_input_patterns(patterns):
+    """
+    Expand the file names and glob patterns given on the command line into a list of excel files.
+
+    :param patterns: [list] file names and glob patterns (e.g. "tables/*.xlsx")
+    :return: [list] paths of the excel files, in the order given and without duplicates. Patterns that do not match any
+    file are kept as they are, so that they are reported as failures.
+    """
+
+    input_files = []
+
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+
+        if not matches:
+            matches = [pattern]
+
+        for match in matches:
+            if match not in input_files:
+                input_files.append(match)
+
+    return input_files
+
+
+def main(argv=None):
+    """
+    Command line interface, run with "python -m e2lvp". Converts each of the given workbooks, writing the TeX files of
+    each one to its own folder (named after the workbook) within the output directory. Run "python -m e2lvp --help" for
+    the full list of options.
+
+    :param argv: [list] command line arguments (if None, the arguments the script was run with are used)
+    :return: [Int] exit code: 0 if every workbook was converted, 1 if any failed
+    """
+
+    parser = argparse.ArgumentParser(prog='python -m e2lvp',
+                                     description='Create .TeX table files from the worksheets of excel workbooks.')
+    parser.add_argument('inputs', nargs='+', metavar='INPUT',
+                        help='excel files to convert, or glob patterns matching them (e.g. "tables/**/*.xlsx")')
+    parser.add_argument('-o', '--output-dir', required=True,
+                        help='directory to output the TeX files to. The TeX files of each workbook are put in a folder '
+                             'named after the workbook.')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of workbooks to convert at the same time (default: number of CPUs)')
+    parser.add_argument('--no-booktabs', dest='booktabs', action='store_false',
+                        help='use regular horizontal rules rather than booktabs')
+    parser.add_argument('--no-tabular', dest='includetabular', action='store_false',
+                        help='do not wrap each table in a tabular environment')
+    parser.add_argument('--no-round', dest='roundtodp', action='store_false',
+                        help='do not round numbers to a fixed number of decimal places')
+    parser.add_argument('--numdp', type=int, default=3, help='number of decimal places to round to (default: 3)')
+    parser.add_argument('--makepdf', action='store_true', help='also create a PDF of all the tables of each workbook')
+    parser.add_argument('--preview', action='store_true',
+                        help='with --makepdf, compile each table separately in parallel, skipping unchanged tables')
+    parser.add_argument('--pdf-timeout', type=float, default=120, metavar='SECONDS',
+                        help='with --makepdf, seconds to wait for each run of pdflatex before giving up (default: 120)')
+    parser.add_argument('--streaming', action='store_true', help='open the workbooks in read-only mode')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-create the TeX files of tables that have changed since the last run')
+    parser.add_argument('--timing', action='store_true',
+                        help='report the time spent in each stage of the conversion (use with --verbose)')
+    parser.add_argument('--sheets', nargs='+', default=None, metavar='SHEET',
+                        help='names or glob patterns of the worksheets to convert (default: all worksheets)')
+    parser.add_argument('--exclude-sheets', nargs='+', default=None, metavar='SHEET',
+                        help='names or glob patterns of worksheets not to convert')
+    parser.add_argument('--multitable', action='store_true',
+                        help='look for more than one table within each worksheet (tables separated by empty rows or '
+                             'columns), writing each to SHEET_1.tex, SHEET_2.tex, ...')
+    parser.add_argument('--named-ranges', dest='named_ranges', action='store_true',
+                        help='convert the defined names and Excel tables of each worksheet (each to NAME.tex) rather '
+                             'than the worksheets themselves')
+    parser.add_argument('--longtable', action='store_true',
+                        help='write each table as a longtable that can break across pages, repeating its header rows')
+    parser.add_argument('--header-rows', type=int, default=1, metavar='N',
+                        help='number of header rows of each table, repeated on each page of a longtable and in each '
+                             'part made by --chunk-rows (default: 1)')
+    parser.add_argument('--chunk-rows', type=int, default=None, metavar='N',
+                        help='split tables with more than N rows below their header into parts of N rows, each written '
+                             'to its own TeX file (NAME_part1.tex, NAME_part2.tex, ...)')
+    parser.add_argument('--cache-dir', default=None, metavar='DIR',
+                        help='keep a cache of converted tables in DIR, shared between workbooks and runs, and copy '
+                             'tables that have been converted before from it')
+    parser.add_argument('--cache-size-mb', type=float, default=_CACHE_SIZE_MB, metavar='MB',
+                        help='size limit of the cache of converted tables, removing the least recently used tables '
+                             'beyond it (default: %d)' % _CACHE_SIZE_MB)
+    parser.add_argument('--watch', action='store_true',
+                        help='keep watching the workbook (a single INPUT) and re-create the TeX files of the tables '
+                             'that have changed each time it is saved, until stopped with Ctrl+C')
+    parser.add_argument('--debounce', type=float, default=0.3, metavar='SECONDS',
+                        help='with --watch, convert a save once the workbook has stopped changing for this many '
+                             'seconds (default: 0.3)')
+    parser.add_argument('--poll-interval', type=float, default=0.2, metavar='SECONDS',
+                        help='with --watch, seconds between each check of the workbook for changes (default: 0.2)')
+    parser.add_argument('--report', action='store_true',
+                        help='write a JSON report of the time spent in each stage, the number of cells of each table '
+                             'and the peak memory use to ' + _REPORT_FILENAME + ' in the output folder of each '
+                             'workbook')
+    parser.add_argument('--profile', metavar='FILE', default=None,
+                        help='profile the run with cProfile and write the statistics to FILE (view them with the '
+                             'pstats module). The workbooks are then converted one at a time in this process.')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='print the full output of the conversion of each workbook')
+
+    args = parser.parse_args(argv)
+
+    input_files = _expand_input_patterns(args.inputs)
+
+    # Each workbook is written to a folder named after it, so two workbooks with the same name would overwrite each
+    # other's tables
+    output_dirs = [os.path.join(args.output_dir, os.path.splitext(os.path.basename(input_file))[0], '')
+                   for input_file in input_files]
+
+    if len(set(output_dirs)) < len(output_dirs):
+        parser.error('two or more input workbooks have the same file name, so their output folders would clash')
+
+    settings = {'booktabs': args.booktabs, 'includetabular': args.includetabular, 'roundtodp': args.roundtodp,
+                'numdp': args.numdp, 'makepdf': args.makepdf, 'streaming': args.streaming,
+                'incremental': args.incremental, 'timing': args.timing, 'sheets': args.sheets,
+                'exclude_sheets': args.exclude_sheets, 'preview': args.preview, 'multitable': args.multitable,
+                'named_ranges': args.named_ranges, 'longtable': args.longtable, 'header_rows': args.header_rows,
+                'chunk_rows': args.chunk_rows, 'cache_dir': args.cache_dir, 'cache_size_mb': args.cache_size_mb,
+                'pdf_timeout': args.pdf_timeout}
+
+    # Watch a single workbook, converting it each time it is saved (the conversion is always incremental)
+    if args.watch:
+        if len(input_files) != 1:
+            parser.error('--watch takes a single input workbook')
+
+        os.makedirs(output_dirs[0], exist_ok=True)
+
+        watch_excel2latexviapython(input_files[0], output_dirs[0], poll_interval=args.poll_interval,
+                                   debounce=args.debounce,
+                                   **{key: value for key, value in settings.items()
+                                      if key not in ('incremental', 'timing')})
+        return 0
+
+    jobs = min(args.jobs or os.cpu_count() or 1, len(input_files))
+
+    # The profiler only sees the work done in this process
+    profiler = None
+    if args.profile is not None:
+        jobs = 1
+        profiler = cProfile.Profile()
+
+    # Convert the workbooks, in parallel if there is more than one job. Results are reported as each workbook finishes.
+    results = {}
+    tic = time.perf_counter()
+
+    def report(input_file, result):
+        run_time, log, error = result
+        results[input_file] = result
+
+        # Only print the full output of the conversion if asked to. Otherwise just report why a workbook failed.
+        if args.verbose:
+            print(log, end='')
+            if error is not None:
+                print(error, end='')
+        elif error is not None:
+            print(error.strip().splitlines()[-1])
+
+        print(('FAILED  ' if error is not None else 'OK      ') + input_file + '    %.2f seconds' % run_time)
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(_convert_workbook_file, input_file, output_dir, settings, args.report):
+                       input_file for input_file, output_dir in zip(input_files, output_dirs)}
+
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+    else:
+        if profiler is not None:
+            profiler.enable()
+
+        for input_file, output_dir in zip(input_files, output_dirs):
+            report(input_file, _convert_workbook_file(input_file, output_dir, settings, args.report))
+
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+
+    # SUMMARY
+    # ==================================================================================================================
+
+    failed = [input_file for input_file in input_files if results[input_file][2] is not None]
+
+    print('\nSummary:')
+    for input_file in input_files:
+        status = 'FAILED' if input_file in failed else 'OK'
+        print('    %-6s  %8.2f seconds    ' % (status, results[input_file][0]) + input_file)
+
+    print('\n' + str(len(input_files) - len(failed)) + ' of ' + str(len(input_files)) + ' workbooks converted in ' +
+          '%.2f seconds' % (time.perf_counter() - tic))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,8 @@
 from tkinter import *
 from tkinter import filedialog
+import queue
+import threading
+import time
 import e2lvp  # Model functions to simulate the LBH model
 
 
@@ -108,14 +111,93 @@ lbl_execute = Label(window, text="Run Excel2LaTeXviaPython")
 lbl_execute.grid(column=0, row=execute_row)
 
 
+# The conversion is run in a background thread, so the window keeps responding while it runs. The thread reports its
+# progress back through a queue, which the window checks every poll_ms milliseconds.
+poll_ms = 100
+progress_queue = queue.Queue()
+cancel_event = threading.Event()
+run_start_time = [0.0]
+run_cells = [0]
+
+lbl_progress = Label(window, text="")
+lbl_progress.grid(column=0, row=execute_row+2, columnspan=3)
+
+
+def run_conversion(settings):  # Runs in the background thread
+    sheets_done = [0, None]  # Number of worksheets converted so far, and the number to convert
+
+    def progress(sheet_name, num_done, num_sheets, num_cells):
+        sheets_done[:] = [num_done, num_sheets]
+        progress_queue.put(('progress', (sheet_name, num_done, num_sheets, num_cells)))
+
+    try:
+        e2lvp.excel2latexviapython(progress=progress, cancel=cancel_event, **settings)
+    except Exception as error:
+        progress_queue.put(('error', repr(error)))
+    else:
+        # Cancel may be clicked after the last worksheet has been converted, in which case the run still finished
+        stopped_early = cancel_event.is_set() and ((sheets_done[1] is None) or (sheets_done[0] < sheets_done[1]))
+        progress_queue.put(('done', stopped_early))
+
+
+def poll_progress():  # Update the window with any progress reported by the background thread
+    while True:
+        try:
+            message, details = progress_queue.get_nowait()
+        except queue.Empty:
+            window.after(poll_ms, poll_progress)
+            return
+
+        if message == 'progress':
+            sheet_name, num_done, num_sheets, num_cells = details
+            run_cells[0] += num_cells
+
+            elapsed = time.perf_counter() - run_start_time[0]
+            eta = elapsed / num_done * (num_sheets - num_done)
+
+            lbl_progress.configure(text="Converted %s (%d of %d)    %.0f cells/sec    ETA %.1f seconds"
+                                        % (sheet_name, num_done, num_sheets, run_cells[0] / max(elapsed, 1e-9), eta))
+        else:
+            if message == 'error':
+                lbl_progress.configure(text="Failed: " + details)
+            elif details:
+                lbl_progress.configure(text="Cancelled")
+            else:
+                lbl_progress.configure(text="Finished in %.1f seconds" % (time.perf_counter() - run_start_time[0]))
+
+            btn.configure(state=NORMAL)
+            btn_cancel.configure(state=DISABLED)
+            return
+
+
 def clicked_execute():  # What happens when button is clicked
-    e2lvp.excel2latexviapython(lbl_input_file_name["text"][7:], lbl_output_folder_name["text"][9:], booktabs=chk_state_bt.get(),
-                         includetabular=chk_state_te.get(), roundtodp=chk_state_rnd.get(), numdp=int(txt_numdp.get()),
-                         makepdf=chk_state_pdf.get())
+    settings = dict(input_excel_filename=lbl_input_file_name["text"][7:],
+                    output_dir=lbl_output_folder_name["text"][9:], booktabs=chk_state_bt.get(),
+                    includetabular=chk_state_te.get(), roundtodp=chk_state_rnd.get(), numdp=int(txt_numdp.get()),
+                    makepdf=chk_state_pdf.get())
+
+    cancel_event.clear()
+    run_start_time[0] = time.perf_counter()
+    run_cells[0] = 0
+
+    btn.configure(state=DISABLED)
+    btn_cancel.configure(state=NORMAL)
+    lbl_progress.configure(text="Running...")
+
+    threading.Thread(target=run_conversion, args=(settings,), daemon=True).start()
+    window.after(poll_ms, poll_progress)
+
+
+def clicked_cancel():  # Stop the run once the worksheet currently being converted is finished
+    cancel_event.set()
+    lbl_progress.configure(text="Cancelling...")
 
 
 btn = Button(window, text="Execute", command=clicked_execute)
 
 btn.grid(column=0, row=execute_row+1)
 
+btn_cancel = Button(window, text="Cancel", command=clicked_cancel, state=DISABLED)
+btn_cancel.grid(column=1, row=execute_row+1)
+
 window.mainloop()